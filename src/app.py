@@ -4,7 +4,6 @@ Mini Alpha-Go 主 GUI 程序
 import argparse
 import os
 import sys
-from copy import deepcopy
 from os.path import join
 
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread
@@ -17,6 +16,8 @@ from PyQt5.QtWidgets import (
     QMessageBox,
 )
 
+from engines import load_engine
+from engines.timecontrol import Budget
 from env.board import B, Board, W
 
 GRID_SIZE = 40
@@ -28,7 +29,7 @@ NAMES = ["", "BLACK", "WHITE"]
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # 脚本目录路径
 
 parser = argparse.ArgumentParser(
-    description="Mini Alpha-Go. Available engines: mcts, random, greedy, human"
+    description="Mini Alpha-Go. Available engines: mcts, mcts_shared, mcts_engine, alphabeta, random, greedy, human"
 )
 parser.add_argument(
     "-a",
@@ -44,6 +45,69 @@ parser.add_argument(
     default="human",
     help="Engine for player b (white). Default: human.",
 )
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    default=1,
+    help="Processes used by the mcts engines to search in parallel. Default: 1.",
+)
+parser.add_argument(
+    "--batch",
+    type=int,
+    default=1,
+    help="Random playouts per leaf run together with numpy by the mcts engine. Default: 1.",
+)
+parser.add_argument(
+    "--rollout-depth",
+    type=int,
+    help="Random plies before the mcts engine scores a playout with the static "
+    "evaluation. Default: play out to the end.",
+)
+parser.add_argument(
+    "-t",
+    "--time",
+    type=float,
+    help="Seconds per move for the search engines. Default: engine's own (55 for mcts).",
+)
+parser.add_argument(
+    "--game-time",
+    type=float,
+    help="Total seconds per game for each search engine, split over the moves.",
+)
+parser.add_argument(
+    "--increment",
+    type=float,
+    default=0.0,
+    help="Seconds added to --game-time after every move. Default: 0.",
+)
+parser.add_argument(
+    "--nodes",
+    type=int,
+    help="Playouts (nodes) per move for the search engines.",
+)
+parser.add_argument(
+    "--book",
+    type=str,
+    help="Opening book consulted by the search engines, empty to disable. "
+    "Default: assets/book.bin.",
+)
+parser.add_argument(
+    "--ponder",
+    action="store_true",
+    help="Let the mcts engine keep searching while its opponent is thinking.",
+)
+parser.add_argument(
+    "--knowledge",
+    type=str,
+    help="SQLite file where the mcts engine keeps position statistics across "
+    "games. Default: none.",
+)
+parser.add_argument(
+    "--telemetry",
+    type=str,
+    help="Append the search statistics of every move to this file as JSON lines.",
+)
 
 
 class Worker(QThread):
@@ -59,6 +123,19 @@ class Worker(QThread):
         self.signal.emit(result)
 
 
+class Ponder(QThread):
+    """ 对手思考时让引擎在后台继续搜索，budget.stop() 后结束 """
+
+    def __init__(self, engine, board):
+        QThread.__init__(self)
+        self.engine = engine
+        self.board = board
+        self.budget = Budget()
+
+    def run(self):
+        self.engine.ponder(self.board, self.budget)
+
+
 class Piece(QLabel):
     """ Piece: clickable QLabel """
 
@@ -74,8 +151,9 @@ class Piece(QLabel):
 class App(QMainWindow):
     round_switched = pyqtSignal()
     worker_signal = pyqtSignal()
+    stats_signal = pyqtSignal(object)
 
-    def __init__(self, engine_a: str, engine_b: str):
+    def __init__(self, engine_a: str, engine_b: str, options: dict = None):
         super().__init__()
         self.title = "Mini Alpha-Go (Black: %s vs White: %s)" % (engine_a, engine_b)
         self.width = 640
@@ -86,10 +164,22 @@ class App(QMainWindow):
         self.timer.timeout.connect(self.update_time)
         self.time = [None, 0, 0]
         self.threads = []
-
-        Engine_A = __import__("engines." + engine_a).__dict__[engine_a].engine
-        Engine_B = __import__("engines." + engine_b).__dict__[engine_b].engine
-        self.engine = ["", Engine_A(), Engine_B()]
+        self.ponder = (options or {}).get("ponder", False)
+        self.ponderer = None
+
+        # 引擎在工作线程中产生统计，经信号交给界面线程显示在状态栏；
+        # 同时照常打印，指定了文件时再写入文件
+        options = dict(options or {})
+        sinks = [None, self.stats_signal.emit]
+        if options.get("telemetry"):
+            sinks.append(options["telemetry"])
+        options["telemetry"] = sinks
+        self.stats_signal.connect(self.show_stats)
+        self.engine = [
+            "",
+            load_engine(engine_a, **options),
+            load_engine(engine_b, **options),
+        ]
         self.worker_signal.connect(self.spawn_new_thread)
         self.round_switched.connect(self.run_game)
 
@@ -180,20 +270,47 @@ class App(QMainWindow):
 
         # Status bar
         self.statusBar().showMessage("Ready.")
+        self.stats_label = QLabel(self)
+        self.statusBar().addPermanentWidget(self.stats_label)
 
         # show ui
         self.show()
 
         # play
         if self.engine[B] == "human":
-            pass
+            self.start_ponder()
         elif self.engine[W] == "human":
             self.run_game()
         else:
             self.spawn_new_thread()
 
+    def start_ponder(self):
+        """ 轮到对方走棋时，让刚走完的一方（支持 ponder 的引擎）在后台搜索 """
+        engine = self.engine[-self.board.color]
+        if (
+            not self.ponder
+            or self.board.is_terminal
+            or engine in ("", "human")
+            or engine is self.engine[self.board.color]
+            or not hasattr(engine, "ponder")
+        ):
+            return
+        self.ponderer = Ponder(engine, self.board.clone())
+        self.ponderer.start()
+
+    def stop_ponder(self):
+        """ 对方走完（或对局结束）时停止后台搜索，等线程退出后才能让引擎走棋 """
+        if self.ponderer is not None:
+            self.ponderer.budget.stop()
+            self.ponderer.wait()
+            self.ponderer = None
+
+    def closeEvent(self, event):
+        self.stop_ponder()
+        event.accept()
+
     def spawn_new_thread(self):
-        t = Worker(self.engine[self.board.color], deepcopy(self.board))
+        t = Worker(self.engine[self.board.color], self.board.clone())
         t.signal.connect(self.update_from_workers)
         t.start()
         self.threads.append(t)
@@ -203,35 +320,41 @@ class App(QMainWindow):
             source, target = result
             self.update_statusbar(source, target)
 
+            self.stop_ponder()
             self.board.exec(source, target)
 
             self.update_pieces()
             self.update_scoreboard()
+            if not self.board.is_terminal:
+                # 终局后不再让输的一方思考，直接结束
+                self.spawn_new_thread()
+                self.start_ponder()
+                return
+        self.end_game()
+        winner = NAMES[-self.board.color]
+        reply = QMessageBox.question(
+            self,
+            "Game over!",
+            "The winner is %s! Restart the game?" % winner,
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes,
+        )
+        if reply == QMessageBox.Yes:
+            self.board = Board()
+            self.time = [None, 0, 0]
+            self.update_pieces()
+            self.update_scoreboard()
+            self.update_time()
             self.spawn_new_thread()
         else:
-            winner = NAMES[-self.board.color]
-            reply = QMessageBox.question(
-                self,
-                "Game over!",
-                "The winner is %s! Restart the game?" % winner,
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.Yes,
-            )
-            if reply == QMessageBox.Yes:
-                self.board = Board()
-                self.time = [None, 0, 0]
-                self.update_pieces()
-                self.update_scoreboard()
-                self.update_time()
-                self.spawn_new_thread()
-            else:
-                self.close()
+            self.close()
 
     def run_game(self):
+        self.stop_ponder()
         if not self.board.is_terminal:
             if self.engine[self.board.color] != "human":
                 source, target = self.engine[self.board.color].exec(
-                    deepcopy(self.board)
+                    self.board.clone()
                 )
                 self.update_statusbar(source, target)
 
@@ -239,7 +362,9 @@ class App(QMainWindow):
 
                 self.update_pieces()
                 self.update_scoreboard()
+            self.start_ponder()
         if self.board.is_terminal:
+            self.end_game()
             winner = NAMES[-self.board.color]
             reply = QMessageBox.question(
                 self,
@@ -258,6 +383,16 @@ class App(QMainWindow):
             else:
                 self.close()
 
+    def end_game(self):
+        """ 对局结束，让引擎保存这一局积累的统计（见 engines/knowledge.py） """
+        self.stop_ponder()
+        for engine in self.engine[1:]:
+            if hasattr(engine, "end_game"):
+                engine.end_game()
+
+    def show_stats(self, stats):
+        self.stats_label.setText(stats.summary())
+
     def update_statusbar(self, source, target):
         if source is None:
             self.statusBar().showMessage(
@@ -265,7 +400,7 @@ class App(QMainWindow):
                 % (NAMES[-self.board.color], NAMES[self.board.color])
             )
         else:
-            if self.board.matrix[target[0]][target[1]] != 0:
+            if self.board.piece_at(target) != 0:
                 self.statusBar().showMessage(
                     "%s ate 1 %s!" % (NAMES[self.board.color], NAMES[-self.board.color])
                 )
@@ -306,9 +441,9 @@ class App(QMainWindow):
                 label.is_candidate = False
                 label.clicked.connect(self.mouseClickEvent)
                 row.append(label)
-                if self.board.matrix[i][j] == B:
+                if self.board.piece_at((i, j)) == B:
                     label.setPixmap(self.black)
-                elif self.board.matrix[i][j] == W:
+                elif self.board.piece_at((i, j)) == W:
                     label.setPixmap(self.white)
                 else:
                     continue
@@ -318,7 +453,7 @@ class App(QMainWindow):
         for i in range(8):
             for j in range(8):
                 self.pieces[i][j].setPixmap(
-                    [self.empty, self.black, self.white][self.board.matrix[i][j]]
+                    [self.empty, self.black, self.white][self.board.piece_at((i, j))]
                 )
                 self.pieces[i][j].is_candidate = False
                 self.pieces[i][j].setStyleSheet(r"QLabel {}")
@@ -341,9 +476,9 @@ class App(QMainWindow):
         if self.selected_index is not None:
             prev_i, prev_j = self.selected_index
             self.pieces[prev_i][prev_j].setStyleSheet(r"QLabel {}")
-            if self.board.matrix[prev_i][prev_j] == B:
+            if self.board.piece_at((prev_i, prev_j)) == B:
                 self.pieces[prev_i][prev_j].setPixmap(self.black)
-            elif self.board.matrix[prev_i][prev_j] == W:
+            elif self.board.piece_at((prev_i, prev_j)) == W:
                 self.pieces[prev_i][prev_j].setPixmap(self.white)
             else:
                 self.pieces[prev_i][prev_j].setPixmap(self.empty)
@@ -354,7 +489,7 @@ class App(QMainWindow):
             old_color = self.board.color
 
             # status bar: eating happens
-            if self.board.matrix[i][j] != 0:
+            if self.board.piece_at((i, j)) != 0:
                 self.statusBar().showMessage(
                     "%s ate 1 %s!" % (NAMES[old_color], NAMES[-old_color])
                 )
@@ -387,13 +522,13 @@ class App(QMainWindow):
         # clear previous available steps
         for step in self.avail_steps_cache:
             cache_i, cache_j = step
-            if self.board.matrix[cache_i][cache_j] == 0:
+            if self.board.piece_at((cache_i, cache_j)) == 0:
                 self.pieces[cache_i][cache_j].setPixmap(self.empty)
             self.pieces[cache_i][cache_j].setStyleSheet(r"QLabel {}")
             self.pieces[cache_i][cache_j].is_candidate = False
 
         # highlight a piece
-        if self.board.matrix[i][j] == self.board.color:
+        if self.board.piece_at((i, j)) == self.board.color:
             # set new background color
             self.selected_index = sender.index
             self.pieces[i][j].setStyleSheet(r"QLabel {background-color: red}")
@@ -409,7 +544,7 @@ class App(QMainWindow):
             for step in avail_steps:
                 avail_i, avail_j = step
                 # can eat an enemy
-                if self.board.matrix[avail_i][avail_j] != 0:
+                if self.board.piece_at((avail_i, avail_j)) != 0:
                     self.pieces[avail_i][avail_j].setStyleSheet(
                         r"QLabel {background-color: blue}"
                     )
@@ -428,5 +563,18 @@ class App(QMainWindow):
 if __name__ == "__main__":
     args = parser.parse_args()
     app = QApplication(sys.argv)
-    ex = App(args.engine_a, args.engine_b)
+    options = {
+        "workers": args.workers,
+        "batch": args.batch,
+        "rollout_depth": args.rollout_depth,
+        "time": args.time,
+        "game_time": args.game_time,
+        "increment": args.increment,
+        "nodes": args.nodes,
+        "ponder": args.ponder,
+        "book": args.book,
+        "telemetry": args.telemetry,
+        "knowledge": args.knowledge,
+    }
+    ex = App(args.engine_a, args.engine_b, options)
     sys.exit(app.exec_())
@@ -0,0 +1,5 @@
+"""
+基准测试，在 src 目录下运行，例如：
+
+    python -m bench.mcts_parallel -h
+"""
@@ -0,0 +1,124 @@
+"""
+Board 各个基本操作的耗时：在随机对局中取 --positions 个局面，每个操作在
+所有局面上各调用一次，重复 --repeat 轮取最快的一轮，给出每次调用的纳秒数。
+
+--save 把结果保存为基准，之后用 --baseline 对比（比值小于 1 表示变快了）；
+--json 只输出一行 JSON，便于脚本读取。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import time
+
+from env.board import Board
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("-p", "--positions", type=int, default=2000, help="Random positions.")
+parser.add_argument("-r", "--repeat", type=int, default=5, help="Rounds per operation.")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--json", action="store_true", help="Print one JSON object.")
+parser.add_argument("--save", nargs="?", const=BASELINE, help="Save the results as a baseline.")
+parser.add_argument(
+    "--baseline", nargs="?", const=BASELINE, help="Compare with a saved baseline."
+)
+
+
+def random_positions(n: int) -> list:
+    """ n 个非终局的 (局面, 该局面的一个随机走法) """
+    positions = []
+    while len(positions) < n:
+        board = Board()
+        while not board.is_terminal and len(positions) < n:
+            steps = board.avail_steps[board.color]
+            source = random.choice(list(steps))
+            move = source, random.choice(steps[source])
+            positions.append((board.clone(), move))
+            board.exec(*move)
+    return positions
+
+
+def push_pop(board: Board, move: tuple) -> None:
+    board.push(*move)
+    board.pop()
+
+
+def exec_clone(board: Board, move: tuple) -> None:
+    board.clone().exec(*move)
+
+
+def list_moves(board: Board, move: tuple) -> None:
+    for source, targets in board.avail_steps[board.color].items():
+        for target in targets:
+            pass
+
+
+OPERATIONS = {
+    "push_pop": push_pop,
+    "exec_clone": exec_clone,
+    "clone": lambda board, move: board.clone(),
+    "get_avail_steps": lambda board, move: board.get_avail_steps(board.color),
+    "list_moves": list_moves,
+    "random_step": lambda board, move: board.random_step(),
+    "is_connected": lambda board, move: board.is_connected(),
+    "get_connected": lambda board, move: board.get_connected(),
+    "key": lambda board, move: board.key,
+    "hash_state": lambda board, move: board.hash_state(),
+    "hash_after": lambda board, move: board.hash_after(*move),
+}
+
+
+def measure(operation, positions: list, repeat: int) -> float:
+    """ 每次调用的纳秒数 """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for board, move in positions:
+            operation(board, move)
+        best = min(best, time.perf_counter() - start)
+    return best / len(positions) * 1e9
+
+
+def main():
+    args = parser.parse_args()
+    random.seed(args.seed)
+    positions = random_positions(args.positions)
+    results = {
+        name: measure(operation, positions, args.repeat)
+        for name, operation in OPERATIONS.items()
+    }
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "positions": args.positions,
+        "ns": results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["ns"]
+        report["ratio"] = {
+            name: ns / baseline[name] for name, ns in results.items() if name in baseline
+        }
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for name, ns in results.items():
+            line = "%-16s %10.0f ns" % (name, ns)
+            if baseline and name in baseline:
+                line += "  %10.0f ns  x%.2f" % (baseline[name], ns / baseline[name])
+            print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+共享树并行 MCTS 与单进程 MonteCarlo 的对比：相同思考时间下的每秒模拟次数，
+以及互相对弈的胜负（双方轮流执黑）。
+"""
+import argparse
+import contextlib
+import io
+import random
+
+from engines.mcts import MonteCarlo
+from engines.mcts_shared import SharedTreeMonteCarlo
+from env.board import B, Board
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("-t", "--time", type=float, default=5, help="Seconds per move.")
+parser.add_argument("-w", "--workers", type=int, default=4, help="Shared-tree processes.")
+parser.add_argument("-g", "--games", type=int, default=4, help="Games to play.")
+parser.add_argument(
+    "-p", "--positions", type=int, default=3, help="Positions for the speed test."
+)
+parser.add_argument("--seed", type=int, default=0)
+
+
+def quiet_exec(engine, board: Board):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return engine.exec(board.clone())
+
+
+def random_position(plies: int) -> Board:
+    board = Board()
+    for _ in range(plies):
+        if board.is_terminal:
+            break
+        source = random.choice(list(board.avail_steps[board.color].keys()))
+        board.exec(source, random.choice(board.avail_steps[board.color][source]))
+    return board
+
+
+def speed(engines: dict, positions: list) -> None:
+    for name, engine in engines.items():
+        # 提前停止时搜索用不满 seconds，按实际用时计算
+        games = elapsed = 0
+        for board in positions:
+            quiet_exec(engine, board)
+            games += engine.stats.playouts
+            elapsed += engine.stats.seconds
+        print("%-10s %8.1f playouts/s" % (name, games / elapsed if elapsed else 0.0))
+
+
+def match(shared, single, games: int) -> None:
+    score = {"shared": 0, "single": 0, "draw": 0}
+    for g in range(games):
+        # 双方轮流执黑
+        players = {B: shared, -B: single} if g % 2 == 0 else {B: single, -B: shared}
+        board = Board()
+        for _ in range(300):
+            if board.is_terminal:
+                break
+            source, target = quiet_exec(players[board.color], board)
+            board.exec(source, target)
+        if board.is_terminal:
+            winner = players[-board.color]
+            score["shared" if winner is shared else "single"] += 1
+        else:
+            score["draw"] += 1
+        print("game %d: %s" % (g + 1, score))
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    random.seed(args.seed)
+    # 关闭开局库，否则开局的局面不经搜索
+    shared = SharedTreeMonteCarlo(time=args.time, workers=args.workers, book="")
+    single = MonteCarlo(time=args.time, book="")
+    positions = [Board()] + [
+        random_position(random.randrange(10, 40)) for _ in range(args.positions - 1)
+    ]
+    speed({"shared": shared, "single": single}, positions)
+    match(shared, single, args.games)
@@ -0,0 +1,142 @@
+"""
+perft：从给定局面走 depth 步，统计所有走法序列的个数，用来检查走法生成
+（Board.exec / push / pop / avail_steps）是否正确，也顺便给出每秒节点数。
+终局的局面没有后续走法，不计入更深的层。
+
+局面用从初始局面开始的走法序列表示，每步写成 "ijkl"，即 (i, j) -> (k, l)；
+参考计数由改为位棋盘之前的实现逐个 deepcopy 子局面算出。
+"""
+import argparse
+import json
+import time
+
+from env.board import Board
+
+# (名字, 走法序列, {深度: 叶节点数})
+POSITIONS = [
+    ("start", "", {1: 36, 2: 1244, 3: 44952}),
+    ("opening", "7654 2002 7570 3715 0434 4031", {1: 35, 2: 1386, 3: 45677}),
+    (
+        "early",
+        "0222 2042 7250 4765 0535 4062 3513 1744 5052 3777 0105 2725",
+        {1: 36, 2: 1325, 3: 46225},
+    ),
+    (
+        "middle",
+        "0422 6707 0624 2745 7454 0716 7656 2002 0121 5724 "
+        "5451 6061 7564 4043 5133 3767 2151 6764 2244 5032",
+        {1: 28, 2: 1078, 3: 29873},
+    ),
+    (
+        "late",
+        "0600 1715 7353 4042 0232 1513 0011 6745 5335 5072 "
+        "0131 1333 7456 1050 7557 2754 3113 3041 1346 2021 "
+        "1110 5427 0300 2151 3202 4736 0232 3323 1050 3707",
+        {1: 30, 2: 940, 3: 29128},
+    ),
+]
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("-d", "--depth", type=int, default=3, help="Maximum depth.")
+parser.add_argument("-p", "--position", help="Only this position (by name).")
+parser.add_argument(
+    "--divide", action="store_true", help="Leaf counts per root move at --depth."
+)
+parser.add_argument("--json", action="store_true", help="One JSON object per line.")
+
+
+def parse_moves(text: str) -> list:
+    return [
+        ((int(m[0]), int(m[1])), (int(m[2]), int(m[3]))) for m in text.split()
+    ]
+
+
+def position(moves: str) -> Board:
+    board = Board()
+    for source, target in parse_moves(moves):
+        board.exec(source, target)
+    return board
+
+
+def perft(board: Board, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if board.is_terminal:
+        return 0
+    if depth == 1:
+        return sum(len(targets) for targets in board.avail_steps[board.color].values())
+    nodes = 0
+    # exec 会修改 avail_steps，先把走法取出来
+    moves = [
+        (source, target)
+        for source, targets in board.avail_steps[board.color].items()
+        for target in targets
+    ]
+    for source, target in moves:
+        board.push(source, target)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def divide(board: Board, depth: int) -> dict:
+    """ {"ijkl": 该走法之后的叶节点数} """
+    counts = {}
+    moves = [
+        (source, target)
+        for source, targets in board.avail_steps[board.color].items()
+        for target in targets
+    ]
+    for source, target in moves:
+        board.push(source, target)
+        counts["%d%d%d%d" % (source + target)] = perft(board, depth - 1)
+        board.pop()
+    return counts
+
+
+def main():
+    args = parser.parse_args()
+    failed = 0
+    for name, moves, expected in POSITIONS:
+        if args.position and name != args.position:
+            continue
+        board = position(moves)
+        if args.divide:
+            for move, nodes in sorted(divide(board, args.depth).items()):
+                print(move, nodes)
+            continue
+        for depth in range(1, args.depth + 1):
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            seconds = time.perf_counter() - start
+            ok = expected.get(depth, nodes) == nodes
+            failed += not ok
+            if args.json:
+                print(
+                    json.dumps(
+                        {
+                            "position": name,
+                            "depth": depth,
+                            "nodes": nodes,
+                            "expected": expected.get(depth),
+                            "seconds": seconds,
+                        }
+                    )
+                )
+            else:
+                print(
+                    "%-8s depth %d: %9d nodes %8.0f nodes/s %s"
+                    % (
+                        name,
+                        depth,
+                        nodes,
+                        nodes / seconds if seconds > 0 else 0.0,
+                        "" if ok else "MISMATCH (expected %d)" % expected[depth],
+                    )
+                )
+    if failed:
+        raise SystemExit("%d perft counts differ from the reference" % failed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+引擎包：每个引擎模块提供 engine(**options)，返回带有
+exec(board: Board) -> (source, target) 方法的对象（human 返回字符串 "human"）。
+引擎忽略自己不认识的选项，因此命令行参数可以统一传给双方。
+"""
+import importlib
+
+
+def load_engine(name: str, **options):
+    module = importlib.import_module("engines." + name)
+    return module.engine(**options)
@@ -0,0 +1,268 @@
+"""
+Alpha-beta 引擎
+
+negamax + alpha-beta，迭代加深直到预算用完（见 engines/timecontrol.py）；
+置换表以 Board.key 为键；走法排序依次为置换表中的最佳走法、吃子、
+杀手走法（每层两个）、历史启发；叶节点只搜吃子（quiescence）。
+估值见 engines/evaluation.py。
+
+对手无棋可走时同一方连走两步，子局面的走棋方不一定换人，
+所以每一层按子局面的 color 决定是否对分数取反。
+"""
+import sys
+
+sys.path.append("..")
+from env.board import B, Board
+from engines.book import book_move, open_book
+from engines.evaluation import advantage
+from engines.mcts import legal_moves, unpack_move
+from engines.telemetry import MoveStats, make_sink, peak_memory
+from engines.timecontrol import INF, TimeControl
+from engines.ttable import MB, TranspositionTable
+
+WIN = 1000000.0
+# 绝对值大于 WIN_BOUND 的分数表示必胜 / 必败，与 WIN 的差是到终局的步数
+WIN_BOUND = WIN - 1000
+MAX_PLY = 128
+QUIESCENCE_DEPTH = 4
+# 每多少个节点看一次时间
+CHECK_EVERY = 1024
+
+# 置换表中分数的类型
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# 一个条目连同置换表槽位的大致字节数
+ENTRY_BYTES = 250
+
+
+class Entry(object):
+    """ 置换表条目；plays 用搜索深度，淘汰时同龄的条目先淘汰浅的 """
+
+    __slots__ = ("plays", "age", "score", "flag", "move")
+
+    def __init__(self, depth: int, score: float, flag: int, move: int):
+        self.plays = depth
+        self.age = 0
+        self.score = score
+        self.flag = flag
+        self.move = move
+
+
+class SearchTimeout(Exception):
+    """ 预算用完，放弃当前这一轮迭代 """
+
+
+def to_table(score: float, ply: int) -> float:
+    """ 必胜分数存成相对于本局面的步数，取出时再换算回来 """
+    if score > WIN_BOUND:
+        return score + ply
+    if score < -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def from_table(score: float, ply: int) -> float:
+    if score > WIN_BOUND:
+        return score - ply
+    if score < -WIN_BOUND:
+        return score + ply
+    return score
+
+
+class AlphaBeta(object):
+    def __init__(self, **kwargs):
+        self.time_control = TimeControl.from_options(kwargs, time=10)
+        self.table = TranspositionTable(
+            int(kwargs.get("table_mb", 64) * MB), ENTRY_BYTES, "age"
+        )
+        self.book = open_book(kwargs)
+        self.telemetry = make_sink(kwargs.get("telemetry"))
+        self.stats = None  # 上一步的 MoveStats
+        self.max_depth = kwargs.get("depth", MAX_PLY - QUIESCENCE_DEPTH - 1)
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [0] * 4096  # 以压缩的走法为下标
+        self.budget = None
+        self.best_move = 0
+        self.nodes = 0  # 上一次搜索的节点数（含 quiescence）
+        self.depth = 0  # 上一次搜索完成的深度
+        self.nps = 0.0
+
+    def end_game(self) -> None:
+        """ 对局结束，总时间重新开始 """
+        self.time_control.new_game()
+
+    def exec(self, board: Board) -> (tuple, tuple):
+        hit, record = book_move(self.book, board, "alphabeta", self.telemetry)
+        if hit is not None:
+            self.stats = record
+            return hit
+        move = self.get_play(board)
+        if move is None:
+            return None, None
+        return unpack_move(move)
+
+    def get_play(self, board: Board):
+        """ 迭代加深，返回最后一轮完成的搜索的最佳走法（压缩的） """
+        moves = legal_moves(board)
+        if not moves:
+            return None
+
+        budget = self.time_control.start(board)
+        self.budget = budget
+        self.nodes = 0
+        self.depth = 0
+        self.table.new_search()
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [h >> 1 for h in self.history]
+
+        record = MoveStats("alphabeta", board.color)
+        iterations = []
+        best = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score = self.search(board.clone(), depth, -INF, INF, 0)
+            except SearchTimeout:
+                break
+            best = self.best_move
+            self.depth = depth
+            iterations.append((depth, score, self.nodes) + unpack_move(best))
+            if abs(score) > WIN_BOUND or budget.expired(self.nodes):
+                break
+            # 下一轮至少和之前所有轮加起来一样久，来不及就不开始
+            if budget.elapsed() > budget.remaining():
+                break
+
+        self.time_control.finish(budget)
+        elapsed = budget.elapsed()
+        self.nps = self.nodes / elapsed if elapsed > 0 else 0.0
+
+        record.move = unpack_move(best)
+        record.nodes = self.nodes
+        record.seconds = record.times["search"] = elapsed
+        record.max_depth = record.avg_depth = self.depth
+        record.table = self.table.stats()
+        record.memory = peak_memory()
+        # 每一轮迭代：(深度, 分数, 累计节点数, source, target)
+        record.extra["iterations"] = iterations
+        self.stats = record
+        self.telemetry.emit(record)
+        return best
+
+    def count_node(self) -> None:
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and self.budget.expired(self.nodes):
+            raise SearchTimeout()
+
+    def evaluate(self, board: Board) -> float:
+        """ 走棋方的静态分数 """
+        x = advantage(board)
+        return x if board.color == B else -x
+
+    def child(self, search, board: Board, color: int, depth: int, alpha, beta, ply):
+        """ 走完一步后，子局面对原走棋方 color 的分数 """
+        if board.color == color:
+            return search(board, depth, alpha, beta, ply)
+        return -search(board, depth, -beta, -alpha, ply)
+
+    def order(self, board: Board, moves, tt_move: int, ply: int) -> list:
+        enemy = board.bits[-board.color]
+        killers = self.killers[ply]
+        history = self.history
+        keys = {}
+        for move in moves:
+            if move == tt_move:
+                keys[move] = 1 << 40
+            elif enemy >> (move & 63) & 1:
+                keys[move] = 1 << 39
+            elif move == killers[0]:
+                keys[move] = 1 << 38
+            elif move == killers[1]:
+                keys[move] = 1 << 37
+            else:
+                keys[move] = history[move]
+        return sorted(moves, key=keys.__getitem__, reverse=True)
+
+    def search(self, board: Board, depth: int, alpha: float, beta: float, ply: int) -> float:
+        """ negamax，返回走棋方的分数 """
+        self.count_node()
+        if board.is_terminal:
+            return -(WIN - ply)  # 终局时走棋方总是输家
+        if depth <= 0 or ply >= MAX_PLY - QUIESCENCE_DEPTH:
+            return self.quiescence(board, QUIESCENCE_DEPTH, alpha, beta, ply)
+
+        key = board.key
+        entry = self.table.get(key)
+        tt_move = 0  # 源与目标不同，0 不是合法走法
+        if entry is not None:
+            tt_move = entry.move
+            if entry.plays >= depth and ply > 0:
+                score = from_table(entry.score, ply)
+                if entry.flag == EXACT:
+                    return score
+                if entry.flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        original_alpha = alpha
+        color = board.color
+        enemy = board.bits[-color]
+        best_score, best_move = -INF, 0
+        for move in self.order(board, legal_moves(board), tt_move, ply):
+            board.push(*unpack_move(move))
+            score = self.child(self.search, board, color, depth - 1, alpha, beta, ply + 1)
+            board.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not enemy >> (move & 63) & 1:
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1], killers[0] = killers[0], move
+                    self.history[move] += depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(key, Entry(depth, to_table(best_score, ply), flag, best_move))
+        if ply == 0:
+            self.best_move = best_move
+        return best_score
+
+    def quiescence(self, board: Board, depth: int, alpha: float, beta: float, ply: int) -> float:
+        """ 只搜吃子的走法，走棋方也可以不吃（stand pat） """
+        self.count_node()
+        if board.is_terminal:
+            return -(WIN - ply)
+        best = self.evaluate(board)
+        if best >= beta or depth == 0:
+            return best
+        if best > alpha:
+            alpha = best
+
+        color = board.color
+        enemy = board.bits[-color]
+        for move in legal_moves(board):
+            if not enemy >> (move & 63) & 1:
+                continue
+            board.push(*unpack_move(move))
+            score = self.child(self.quiescence, board, color, depth - 1, alpha, beta, ply + 1)
+            board.pop()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+
+engine = AlphaBeta
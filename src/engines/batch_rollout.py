@@ -0,0 +1,159 @@
+"""
+NumPy 批量随机对局（batched playouts）
+
+同时保存 K 个局面：黑白双方的位棋盘 (K,) uint64、每条线上的棋子数 (K, 46)、
+走棋方与棋子数。每一步为所有局面一起生成合法走法掩码 (K, 64 * 8)，
+每个局面均匀随机选一个走法，再一起走完，直到所有对局结束。
+规则与 Board.exec 相同（包括无棋可走时不换手），胜者为 B / W，
+max_moves 步内未结束记为 0。
+
+需要 numpy（可选依赖，只有 MonteCarlo(batch=K) 时才会导入）。
+"""
+import numpy as np
+
+from env.board import B, FULL, NOT_COL0, NOT_COL7, RAYS, RAY_LINES, SQUARE_LINES, W
+
+
+def _build_tables():
+    target = np.full((64, 8, 9), -1, np.int64)
+    target_bit = np.zeros((64, 8, 9), np.uint64)
+    path = np.zeros((64, 8, 9), np.uint64)
+    for sq in range(64):
+        for d in range(8):
+            for n, ray in enumerate(RAYS[sq * 8 + d]):
+                if ray is not None:
+                    target[sq, d, n], target_bit[sq, d, n], path[sq, d, n] = ray
+    ray_lines = np.array(RAY_LINES, np.int64).reshape(64, 8)
+    square_lines = np.array(SQUARE_LINES, np.int64)
+    return target, target_bit, path, ray_lines, square_lines
+
+
+# 与 env.board 中的表相同，只是换成数组以便批量索引；
+# 射线表按 (方格 * 8 + 方向) * 9 + 线上棋子数 展平
+TARGET, TARGET_BIT, PATH, RAY_LINE, SQUARE_LINE = _build_tables()
+TARGET_FLAT = TARGET.ravel()
+TARGET_BIT_FLAT = TARGET_BIT.ravel()
+PATH_FLAT = PATH.ravel()
+SQ_BITS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+DIRS = np.arange(8)[None, :]
+ONE = np.uint64(1)
+U_FULL = np.uint64(FULL)
+U_NOT_COL0 = np.uint64(NOT_COL0)
+U_NOT_COL7 = np.uint64(NOT_COL7)
+
+
+def grow(bits: np.ndarray) -> np.ndarray:
+    """ 同 env.board.grow，对一组位棋盘 """
+    row = bits | ((bits << ONE) & U_NOT_COL0) | ((bits >> ONE) & U_NOT_COL7)
+    return (row | (row << np.uint64(8)) | (row >> np.uint64(8))) & U_FULL
+
+
+def is_group(bits: np.ndarray) -> np.ndarray:
+    """ 同 env.board.is_group，对一组位棋盘 """
+    group = bits & (~bits + ONE)
+    while True:
+        grown = grow(group) & bits
+        if (grown == group).all():
+            return group == bits
+        group = grown
+
+
+class BatchRollout(object):
+    def __init__(self, boards: list, max_moves: int = 1000, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.max_moves = max_moves
+        self.black = np.array([b.bits[B] for b in boards], np.uint64)
+        self.white = np.array([b.bits[W] for b in boards], np.uint64)
+        self.checkers = np.array([b.checkers.tolist() for b in boards], np.int16)
+        self.color = np.array([b.color for b in boards], np.int8)
+        # counts[:, 0] 黑棋数，counts[:, 1] 白棋数
+        self.counts = np.array([[b.counts[B], b.counts[W]] for b in boards], np.int16)
+        self.done = np.array([b.is_terminal for b in boards], bool)
+        self.winner = np.where(self.done, -self.color, 0).astype(np.int8)
+        self.plies = np.zeros(len(boards), np.int32)
+
+    def legal(self, games: np.ndarray) -> np.ndarray:
+        """ games 中各局面走棋方的合法走法掩码，形状 (k, 64 * 8)，下标为 方格 * 8 + 方向 """
+        is_black = self.color[games] == B
+        own = np.where(is_black, self.black[games], self.white[games])
+        enemy = np.where(is_black, self.white[games], self.black[games])
+        k = len(games)
+
+        # 只检查走棋方棋子所在的方格：(局面, 方格) 对
+        cells = np.unpackbits(
+            own.astype("<u8").view(np.uint8).reshape(k, 8), axis=1, bitorder="little"
+        )
+        row, sq = np.nonzero(cells)
+        n = self.checkers[games[row][:, None], RAY_LINE[sq]]
+        flat = (sq[:, None] * 8 + DIRS) * 9 + n
+        legal = (
+            (TARGET_FLAT[flat] >= 0)
+            & ((TARGET_BIT_FLAT[flat] & own[row][:, None]) == 0)
+            & ((PATH_FLAT[flat] & enemy[row][:, None]) == 0)
+        )
+        mask = np.zeros((k, 512), bool)
+        mask[row[:, None], sq[:, None] * 8 + DIRS] = legal
+        return mask
+
+    def step(self) -> None:
+        games = np.flatnonzero(~self.done)
+        legal = self.legal(games)
+        can_go = legal.any(axis=1)
+
+        # 无棋可走：换对方走；对方也无棋可走则终局，胜者为无棋可走的一方
+        stuck = games[~can_go]
+        if len(stuck):
+            self.color[stuck] *= -1
+            other = self.legal(stuck)
+            over = stuck[~other.any(axis=1)]
+            self.done[over] = True
+            self.winner[over] = -self.color[over]
+
+        games = games[can_go]
+        legal = legal[can_go]
+        if not len(games):
+            return
+
+        # 每个局面均匀随机选一个合法走法
+        r = self.rng.random(legal.shape)
+        r[~legal] = -1.0
+        choice = r.argmax(axis=1)
+        source = choice // 8
+        n = self.checkers[games, RAY_LINE[source, choice % 8]]
+        target = TARGET[source, choice % 8, n]
+
+        color = self.color[games]
+        is_black = color == B
+        own = np.where(is_black, self.black[games], self.white[games])
+        enemy = np.where(is_black, self.white[games], self.black[games])
+        s_bit = SQ_BITS[source]
+        t_bit = SQ_BITS[target]
+        captured = (enemy & t_bit) != 0
+        own = own ^ s_bit ^ t_bit
+        enemy = enemy & ~t_bit
+        self.black[games] = np.where(is_black, own, enemy)
+        self.white[games] = np.where(is_black, enemy, own)
+
+        self.checkers[games[:, None], SQUARE_LINE[source]] -= 1
+        moved = ~captured
+        self.checkers[games[moved][:, None], SQUARE_LINE[target[moved]]] += 1
+        enemy_col = is_black.astype(np.int64)  # 敌方在 counts 中的列
+        self.counts[games[captured], enemy_col[captured]] -= 1
+        self.plies[games] += 1
+
+        # 终局判断，顺序同 Board.exec
+        mover_wins = (self.counts[games, enemy_col] == 1) | is_group(own)
+        enemy_wins = ~mover_wins & is_group(enemy)
+        self.done[games[mover_wins | enemy_wins]] = True
+        self.winner[games[mover_wins]] = color[mover_wins]
+        self.winner[games[enemy_wins]] = -color[enemy_wins]
+        self.color[games] = -color
+
+        over = ~self.done & (self.plies >= self.max_moves)
+        self.done[over] = True
+
+    def run(self) -> np.ndarray:
+        """ 走到所有对局结束，返回各局胜者 """
+        while not self.done.all():
+            self.step()
+        return self.winner
@@ -0,0 +1,139 @@
+"""
+开局库
+
+由 tools/build_book.py 离线生成，文件是按局面键排序的定长记录：
+
+    <QHH: 局面的 Board.key、压缩的走法（同 engines.mcts.pack_move）、权重
+
+同一局面可以有多条记录，查库时取权重最大的合法走法。读取时用 mmap 映射
+整个文件并二分查找，不需要在启动时解析。
+
+搜索引擎在搜索之前用 book_move() 查库：选项 book 为文件路径，默认
+assets/book.bin，设为空字符串则不用开局库；文件不存在时当作空库。
+"""
+import mmap
+import os
+import struct
+import sys
+
+sys.path.append("..")
+from env.board import Board, SQUARES
+from engines.telemetry import MoveStats
+from engines.timecontrol import clock
+
+RECORD = struct.Struct("<QHH")
+KEY = struct.Struct("<Q")
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "assets", "book.bin"
+)
+
+
+class OpeningBook(object):
+    def __init__(self, path: str):
+        self.path = path
+        self.data = None
+        self.size = 0
+        if os.path.exists(path) and os.path.getsize(path) >= RECORD.size:
+            with open(path, "rb") as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = len(self.data) // RECORD.size
+
+    def __len__(self):
+        return self.size
+
+    def records(self):
+        """ 按顺序给出所有 (key, move, weight) """
+        for i in range(self.size):
+            yield RECORD.unpack_from(self.data, i * RECORD.size)
+
+    def lower_bound(self, key: int) -> int:
+        """ 第一条键不小于 key 的记录的下标 """
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(self.data, mid * RECORD.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, board: Board) -> list:
+        """ 局面的所有 (压缩的走法, 权重) """
+        key = board.key
+        moves = []
+        for i in range(self.lower_bound(key), self.size):
+            record_key, move, weight = RECORD.unpack_from(self.data, i * RECORD.size)
+            if record_key != key:
+                break
+            moves.append((move, weight))
+        return moves
+
+    def choose(self, board: Board):
+        """ 库中权重最大的合法走法 (source, target)，不在库中时返回 None """
+        if board.is_terminal:
+            return None
+        steps = board.avail_steps[board.color]
+        for move, _ in sorted(self.lookup(board), key=lambda m: m[1], reverse=True):
+            source, target = SQUARES[move >> 6], SQUARES[move & 63]
+            # 键有极小的概率冲突，只接受当前局面的合法走法
+            if target in steps.get(source, ()):
+                return source, target
+        return None
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+            self.size = 0
+
+
+def write_book(path: str, records) -> int:
+    """
+    把 (key, move, weight) 排序后写入 path，同一局面的同一走法只保留权重最大的；
+    先写临时文件再替换，返回记录数
+    """
+    weights = {}
+    for key, move, weight in records:
+        weights[key, move] = max(weight, weights.get((key, move), 0))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        for (key, move), weight in sorted(weights.items()):
+            f.write(RECORD.pack(key, move, weight))
+    os.replace(tmp, path)
+    return len(weights)
+
+
+# 每个文件只映射一次，由所有引擎共用
+_books = {}
+
+
+def open_book(options: dict):
+    """ 按引擎选项打开开局库，book 为 None 时用默认文件，为空字符串时返回 None """
+    path = options.get("book")
+    if path is None:
+        path = DEFAULT_PATH
+    elif not path:
+        return None
+    if path not in _books:
+        _books[path] = OpeningBook(path)
+    return _books[path]
+
+
+def book_move(book, board: Board, name: str, telemetry) -> tuple:
+    """
+    搜索前查开局库，返回 (走法, 本步的 MoveStats)。命中时统计已填好并交给
+    telemetry；未命中（或 book 为 None）时走法为 None，引擎接着在这条统计中
+    记录搜索
+    """
+    record = MoveStats(name, board.color)
+    if book is None:
+        return None, record
+    start = clock()
+    hit = book.choose(board)
+    record.times["book"] = clock() - start
+    if hit is not None:
+        record.move = hit
+        record.seconds = record.times["book"]
+        record.extra["book"] = True
+        telemetry.emit(record)
+    return hit, record
@@ -0,0 +1,47 @@
+"""
+静态估值
+
+只读 Board.features 和 counts，不扫描棋盘，代价 O(1)：
+    spread: 棋子到本方重心的均方根距离，越小越集中，越接近连成一片
+    groups: 8 连通的块数，用欧拉数（块数减洞数）近似，至少为 1
+    pieces: 棋子数
+"""
+import math
+import sys
+
+sys.path.append("..")
+from env.board import B, W, FEATURE_BASE
+
+# 估值是黑方获胜概率的 logistic 模型：x 为下列各项之和，p = 1 / (1 + e^-x)
+SPREAD_WEIGHT = 1.0  # 每单位 (白方 spread - 黑方 spread)
+GROUPS_WEIGHT = 0.25  # 每个 (白方块数 - 黑方块数)
+PIECES_WEIGHT = 0.1  # 每个 (黑方棋子数 - 白方棋子数)
+
+
+def spread(board, color: int) -> float:
+    """ color 的棋子到其重心的均方根距离 """
+    base = FEATURE_BASE[color]
+    rows, cols, rows2, cols2 = board.features[base : base + 4]
+    n = board.counts[color]
+    variance = (rows2 + cols2) / n - (rows * rows + cols * cols) / (n * n)
+    return math.sqrt(max(variance, 0.0))
+
+
+def groups(board, color: int) -> float:
+    return max(board.features[FEATURE_BASE[color] + 4] / 4, 1.0)
+
+
+def advantage(board) -> float:
+    """ 黑方的优势，即 logistic 模型中的 x，正数对黑方有利；不处理终局 """
+    return (
+        SPREAD_WEIGHT * (spread(board, W) - spread(board, B))
+        + GROUPS_WEIGHT * (groups(board, W) - groups(board, B))
+        + PIECES_WEIGHT * (board.counts[B] - board.counts[W])
+    )
+
+
+def evaluate(board) -> float:
+    """ 黑方获胜的概率估计；终局时为 1 或 0 """
+    if board.is_terminal:
+        return 1.0 if board.color == W else 0.0
+    return 1.0 / (1.0 + math.exp(-advantage(board)))
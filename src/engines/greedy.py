@@ -6,7 +6,7 @@ from env.board import Board
 
 
 class GreedyEngine:
-    def __init__(self):
+    def __init__(self, **options):
         pass
 
     def exec(self, board: Board) -> (tuple, tuple):
@@ -16,7 +16,7 @@ class GreedyEngine:
             awail_steps = list(board.avail_steps[board.color].keys())
             for source in awail_steps:
                 for target in board.avail_steps[board.color][source]:
-                    if board.matrix[target[0]][target[1]] == -board.color:
+                    if board.piece_at(target) == -board.color:
                         return source, target
 
             source = random.choice(list(board.avail_steps[board.color].keys()))
@@ -1,2 +1,2 @@
-def engine():
+def engine(**options):
     return "human"
\ No newline at end of file
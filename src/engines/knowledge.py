@@ -0,0 +1,140 @@
+"""
+跨对局保存的 MCTS 统计（knowledge store）
+
+每个局面的 plays / wins 以 Board.key 为键存在 SQLite 文件中：
+
+    positions(key, player, plays, wins)
+
+搜索展开一个节点时查一次表（warm start），已有统计的局面带着先验开始，
+先验的访问次数不超过 prior，胜率不变。对局结束时 merge() 把本局在置换表中
+新增的统计（减去载入的先验）累加回文件，只保存访问次数至少 min_plays 的节点；
+条目超过 max_entries 时删去访问次数最少的，保持文件大小有界。
+
+引擎选项 knowledge 为文件路径，默认不使用；多个进程可以共用一个文件。
+"""
+import sqlite3
+
+# SQLite 的整数是有符号 64 位
+SIGN = 1 << 63
+WRAP = 1 << 64
+
+
+def to_sql(key: int) -> int:
+    return key - WRAP if key >= SIGN else key
+
+
+class KnowledgeStore(object):
+    def __init__(
+        self,
+        path: str,
+        prior: int = 100,
+        min_plays: int = 20,
+        max_entries: int = 1000000,
+    ):
+        self.path = path
+        self.prior = prior
+        self.min_plays = min_plays
+        self.max_entries = max_entries
+        # 界面每步在不同的线程中调用引擎，但同一时刻只有一个线程使用
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS positions ("
+            "key INTEGER PRIMARY KEY, player INTEGER, plays INTEGER, wins REAL)"
+        )
+        self.db.commit()
+        # 载入时给节点的先验：键 -> (plays, wins)，merge 时从节点的统计中减去
+        self.loaded = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def lookup(self, key: int):
+        """ (player, plays, wins)，不存在时返回 None """
+        return self.db.execute(
+            "SELECT player, plays, wins FROM positions WHERE key = ?", (to_sql(key),)
+        ).fetchone()
+
+    def warm(self, key: int, node) -> bool:
+        """ 用保存的统计初始化刚展开的节点，返回是否找到 """
+        row = self.lookup(key)
+        if row is None or row[0] != node.player or row[1] <= 0:
+            # 节点可能被置换表淘汰后重新展开，之前的先验已不适用
+            self.loaded.pop(key, None)
+            self.misses += 1
+            return False
+        player, plays, wins = row
+        scale = min(1.0, self.prior / plays)
+        node.plays = max(1, int(plays * scale))
+        node.wins = wins * node.plays / plays
+        self.loaded[key] = (node.plays, node.wins)
+        self.hits += 1
+        return True
+
+    def merge(self, entries) -> int:
+        """
+        把 (键, 节点) 中本局新增的统计累加到文件，返回写入的条目数；
+        写入后以节点当前的统计作为新的先验，再次 merge 不会重复计数
+        """
+        rows = []
+        loaded = self.loaded
+        for key, node in entries:
+            if node.plays < self.min_plays:
+                continue
+            plays, wins = loaded.get(key, (0, 0))
+            if node.plays <= plays:
+                continue
+            rows.append(
+                (to_sql(key), node.player, node.plays - plays, node.wins - wins)
+            )
+            loaded[key] = (node.plays, node.wins)
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO positions VALUES (?, ?, 0, 0.0)",
+                ((key, player) for key, player, _, _ in rows),
+            )
+            self.db.executemany(
+                "UPDATE positions SET plays = plays + ?, wins = wins + ? WHERE key = ?",
+                ((plays, wins, key) for key, _, plays, wins in rows),
+            )
+        self.compact()
+        return len(rows)
+
+    def compact(self) -> int:
+        """ 超过 max_entries 时删去访问次数最少的条目，留出 1/8 的余量；返回删除的条目数 """
+        n = len(self)
+        if n <= self.max_entries:
+            return 0
+        excess = n - self.max_entries * 7 // 8
+        with self.db:
+            self.db.execute(
+                "DELETE FROM positions WHERE key IN "
+                "(SELECT key FROM positions ORDER BY plays LIMIT ?)",
+                (excess,),
+            )
+        return excess
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def open_knowledge(options: dict):
+    """ 按引擎选项打开，未指定 knowledge 时返回 None """
+    path = options.get("knowledge")
+    if not path:
+        return None
+    return KnowledgeStore(
+        path,
+        prior=options.get("knowledge_prior", 100),
+        min_plays=options.get("knowledge_min_plays", 20),
+        max_entries=options.get("knowledge_max_entries", 1000000),
+    )
@@ -1,206 +1,553 @@
 import sys
 import random
 import math
-import datetime
+import multiprocessing
+from array import array
 
 sys.path.append("..")
-from env.board import Board
-from copy import deepcopy
+from env.board import B, W, Board, SQUARES
+from engines.book import book_move, open_book
+from engines.evaluation import evaluate
+from engines.knowledge import open_knowledge
+from engines.telemetry import make_sink, peak_memory
+from engines.timecontrol import Budget, TimeControl, clock
+from engines.ttable import MB, TranspositionTable
+
+
+def pack_move(source: tuple, target: tuple) -> int:
+    """ 把走法压缩成 12 位整数：source 方格号 * 64 + target 方格号 """
+    return (source[0] * 8 + source[1]) << 6 | target[0] * 8 + target[1]
+
+
+def unpack_move(move: int) -> tuple:
+    return SQUARES[move >> 6], SQUARES[move & 63]
+
+
+def legal_moves(board: Board) -> array:
+    """ 当前走棋方所有走法，压缩存放 """
+    moves = array("H")
+    if not board.is_terminal:
+        for source, targets in board.avail_steps[board.color].items():
+            for target in targets:
+                moves.append(pack_move(source, target))
+    return moves
+
+
+class Node(object):
+    """
+    搜索树节点，保存在置换表中，以局面的 Board.key 为键
+
+    player: 走到本局面的一方，wins 记录的是 player 的获胜次数
+    untried: 尚未展开的走法
+    child_moves / child_keys: 已展开的走法及其局面的键，
+        子节点本身通过置换表查找，被淘汰后会被重新展开
+    proven: 已证明的胜者 B / W，未证明为 0（MCTS-Solver）。终局局面直接证明；
+        走棋方有一个子节点证明为自己胜，或所有走法都展开过且都证明为对方胜时，
+        本节点也得到证明。用颜色而不是相对 player 的胜负，因为无棋可走时不换手
+    """
+
+    __slots__ = (
+        "player",
+        "wins",
+        "plays",
+        "age",
+        "untried",
+        "child_moves",
+        "child_keys",
+        "proven",
+    )
+
+    def __init__(self, player: int, untried: array):
+        self.player = player
+        self.wins = 0
+        self.plays = 0
+        self.age = 0
+        self.untried = untried
+        self.child_moves = array("H")
+        self.child_keys = array("Q")
+        self.proven = 0
+
+
+# 一个节点连同置换表槽位的大致字节数，用来把内存预算换算成容量
+NODE_BYTES = 800
+
+# profile 选项打开时计时的方法及其阶段名，见 engines/profiler.py
+PHASES = {
+    "run_simulation": "simulation",
+    "descend": "selection",
+    "select_child": "uct",
+    "expand": "expansion",
+    "simulate": "rollout",
+    "backpropagate": "backpropagation",
+    "prove": "prove",
+}
+
+# 根并行时每个子进程中的搜索引擎，跨步保留，以便复用各自的置换表
+_worker = None
+# 与主进程共享的截止时间，主进程提前结束（证明或 early stop）时把它置 0
+_deadline = None
+
+
+class SharedBudget(Budget):
+    """ 截止时间读自共享的 RawValue，主进程可以让子进程提前停下 """
+
+    __slots__ = ("shared",)
+
+    def __init__(self, shared, nodes: float):
+        super().__init__(nodes=nodes)
+        self.shared = shared
+
+    def expired(self, done: int) -> bool:
+        return done >= self.nodes or clock() >= self.shared.value
+
+
+def _init_worker(options: dict, deadline) -> None:
+    global _worker, _deadline
+    random.seed()  # fork 出的子进程会继承父进程的随机数状态
+    _worker = MonteCarlo(**options)
+    _deadline = deadline
+
+
+def _search_worker(board: Board, nodes: float) -> tuple:
+    """ 子进程：独立搜索同一个根局面，返回模拟次数和根节点各走法的统计 """
+    games = _worker.search(board, SharedBudget(_deadline, nodes))
+    return games, _worker.root_stats()
 
 
 class MonteCarlo(object):
     def __init__(self, **kwargs):
-        maxTime = kwargs.get('time',55)   
         maxMoves = kwargs.get('move',1000) #快速完成中的最大步数
-        self.play_time = datetime.timedelta(seconds = maxTime)
+        self.time_control = TimeControl.from_options(kwargs, time=55)
         self.chess_board = Board()
         self.cumulated_states = []
         self.cumulated_states.append(self.chess_board)
         self.max_moves = maxMoves
-        
-        self.wins = {}  # 节点的获胜次数  索引为(player,state_matrix) 不采用(player,state)
-        self.plays = {}  # 节点的访问次数
+
+        # 所有节点保存在容量固定的置换表中，两步之间的统计信息也由它保留
+        self.table = TranspositionTable(
+            int(kwargs.get("table_mb", 256) * MB),
+            NODE_BYTES,
+            kwargs.get("replace", "visits"),
+        )
+        self.root = None
+        self.reused = 0  # 根节点在本次搜索前已有的模拟次数
+        self.games = 0  # 上一次搜索的模拟次数（各进程之和）
         self.C = kwargs.get("C", 1.414)  # UCT的参数C
+        self.book = open_book(kwargs)
+        # 跨对局保存的统计，展开节点时载入，对局结束时由 end_game 写回
+        self.knowledge = open_knowledge(kwargs)
+        self.telemetry = make_sink(kwargs.get("telemetry"))
+        self.stats = None  # 上一步的 MoveStats
         self.max_depth = 0
+        self.depth_sum = 0  # 本次搜索各次模拟的深度之和
+        self.expanded = 0  # 本次搜索新展开的节点数
+
+        # 随机走 rollout_depth 步后还没结束就用静态估值打分，None 表示走到终局
+        self.rollout_depth = kwargs.get("rollout_depth")
+
+        # batch > 1 时每个叶节点用 numpy 一次跑 batch 局随机对局
+        self.batch = kwargs.get("batch", 1)
+        if self.batch > 1:
+            from engines.batch_rollout import BatchRollout
+            self.batch_rollout = BatchRollout
+
+        # 根并行：workers 个进程（含本进程）各自独立搜索同一个根局面，
+        # 每个进程有自己的置换表，最后合并根节点的统计
+        self.workers = kwargs.get("workers", 1)
+        self.worker_options = {
+            "move": maxMoves,
+            "C": self.C,
+            "table_mb": kwargs.get("table_mb", 256),
+            "replace": kwargs.get("replace", "visits"),
+            "batch": self.batch,
+            "rollout_depth": self.rollout_depth,
+            "early_stop": False,  # 子进程只看得到自己的统计，由主进程通知停止
+            "book": "",
+        }
+        self.pool = None
+        self.deadline = None  # 子进程的截止时间，见 SharedBudget
+
+        # profile 为真时给模拟的各阶段计时，结果放在每步的统计中；
+        # 为文件路径时还把每步的 folded stacks 追加到该文件，可以直接画火焰图
+        self.profiler = None
+        self.profile_path = None
+        profile = kwargs.get("profile")
+        if profile:
+            from engines.profiler import Profiler
+            self.profiler = Profiler()
+            self.profiler.instrument(self, PHASES)
+            if isinstance(profile, str):
+                self.profile_path = profile
 
     def update(self, state):
         self.cumulated_states.append(state)
 
     def get_play(self, board: Board):
         self.max_depth = 0
-        
+
         state = board
         player = state.color  # current_player(state)
         legal = list(state.avail_steps[player].keys())
 
         # Bail out early if there is no real choice to be made.
-        if not legal:
+        # 终局时走棋方通常仍有走法，但根节点没有子节点，不能搜索
+        if board.is_terminal or not legal:
             return None,None,None
 
-        games = 0
-        begin = datetime.datetime.utcnow()
-        while datetime.datetime.utcnow() - begin < self.play_time:
-            self.run_simulation(board)
-            games += 1
+        if self.profiler is not None:
+            self.profiler.reset()
+        start = clock()
+        hit, record = book_move(self.book, board, "mcts", self.telemetry)
+        self.stats = record
+        if hit is not None:
+            next_state = state.clone()
+            next_state.exec(*hit)
+            return hit[0], hit[1], next_state
 
-        #moves_states = [(p, self.board.next_state(state, p)) for p in legal]
-        # 不能这么来做，因为这里产生的state和之前simulation里产生的不在同一个地址的，无法索引
-        moves_states = []
-        for p in legal:
-            state_copy = deepcopy(state)
-            for avail_target in state_copy.avail_steps[player][p]:
-                state_copy.exec(p, avail_target)
-                state_matrix = state_copy.hash_state()
-                moves_states.append((p, avail_target, state_copy, state_matrix))
-                state_copy = deepcopy(state)
-
-        # Display the number of calls of 'run_simulation' and the
-        # time elapsed.
-        print(games, datetime.datetime.utcnow() - begin)
-        if player == 1:
-            print("Now player:", "Black")
-        else:
-            print("Now player:", "White")
-
-        # Pick the move with the highest percentage of wins.
-
-        percent_wins, move, target, next_state, state_mat = max(
-            (
-                (
-                    self.wins.get((player, S_mat), 0)
-                    / self.plays.get((player, S_mat), 1),
-                    p,
-                    t,
-                    S,
-                    S_mat,
+        budget = self.time_control.start(board)
+        if self.workers > 1:
+            if self.pool is None:
+                self.deadline = multiprocessing.RawValue("d", 0.0)
+                self.pool = multiprocessing.Pool(
+                    self.workers - 1, _init_worker, (self.worker_options, self.deadline)
                 )
-                for p, t, S, S_mat in moves_states
-            ),
-            key=lambda x: x[0],
-        )
+            self.deadline.value = budget.deadline
+            # 任务在后台线程中序列化，传副本以免与本进程的 push/pop 冲突
+            nodes = budget.nodes / self.workers
+            results = [
+                self.pool.apply_async(_search_worker, (board.clone(), nodes))
+                for _ in range(self.workers - 1)
+            ]
+            budget.nodes = nodes
 
-        # Display the stats for each possible play.
-
-        for x in sorted(
-            (
-                (
-                    100
-                    * self.wins.get((player, S_mat), 0)
-                    / self.plays.get((player, S_mat), 1),
-                    self.wins.get((player, S_mat), 0),
-                    self.plays.get((player, S_mat), 0),
-                    p,
-                )
-                for p, t, S, S_mat in moves_states
-            ),
-            reverse=True,
-        ):
+        games = local_games = self.search(board, budget)
+        if self.workers > 1 and (self.root.proven or not budget.expired(local_games)):
+            # 本进程已证明根节点或提前停止，子进程也不必用完预算
+            self.deadline.value = 0.0
+        record.times["search"] = budget.elapsed()
+        stats = self.root_stats()
+        if self.workers > 1:
+            merge_start = clock()
+            for result in results:
+                worker_games, worker_stats = result.get()
+                games += worker_games
+                for move, (plays, wins) in worker_stats.items():
+                    total_plays, total_wins = stats.get(move, (0, 0))
+                    stats[move] = (total_plays + plays, total_wins + wins)
+            record.times["merge"] = clock() - merge_start
+        self.time_control.finish(budget)
 
-            print("{3}: {0:.2f} % ({1} / {2})".format(*x))
+        self.games = games
 
-        print("Maximum depth searched:", self.max_depth)
+        # 已证明必胜的走法直接走，已证明必败的走法只在全部必败时才考虑；
+        # 其余按访问次数
+        won, lost = self.root_proofs(player)
+        if won is not None:
+            best = won
+        elif not stats:
+            # 根节点的子节点都不在表中（如已被淘汰），随机走一步
+            best = pack_move(*board.random_step())
+        else:
+            candidates = [m for m in stats if m not in lost] or list(stats)
+            best = max(candidates, key=lambda m: stats[m][0])
+        move, target = unpack_move(best)
+
+        record.move = (move, target)
+        record.simulations = games
+        record.playouts = games * self.batch
+        record.nodes = self.expanded
+        record.seconds = clock() - start
+        record.max_depth = self.max_depth
+        record.avg_depth = self.depth_sum / local_games
+        record.table = self.table.stats()
+        record.memory = peak_memory()
+        record.moves = sorted(
+            (unpack_move(m) + (p, w) for m, (p, w) in stats.items()),
+            key=lambda x: x[2],
+            reverse=True,
+        )
+        record.extra["reused"] = self.reused
+        if self.knowledge is not None:
+            record.extra["knowledge"] = self.knowledge.stats()
+        if self.root.proven:
+            record.extra["proven"] = "win" if self.root.proven == player else "loss"
+        if self.profiler is not None:
+            record.extra["profile"] = self.profiler.summary()
+            if self.profile_path:
+                with open(self.profile_path, "a") as f:
+                    f.writelines(line + "\n" for line in self.profiler.folded())
+        self.telemetry.emit(record)
 
-        
+        next_state = state.clone()
+        next_state.exec(move, target)
         return move,target,next_state
-    
-    def run_simulation(self,board):  
-        plays, wins = self.plays, self.wins
-        visited_states = set()
-        states_copy = [board]#self.cumulated_states[:]
-        
-
-        expand = True
-        flag = True
-        for t in range(self.max_moves):
-            state = deepcopy(states_copy[-1])
-            player = state.color
-            
-        
-            legal = list(state.avail_steps[player].keys())
-            moves_states = []
-            for p in legal:
-                state_copy = deepcopy(state)
-                for avail_target in state_copy.avail_steps[player][p]:
-
-                    state_copy.exec(p, avail_target)
-                    state_matrix = state_copy.hash_state()
-                    moves_states.append((p, state_copy, state_matrix))
-                    state_copy = deepcopy(state)
-            
-            #state_matrix 表示在当前状态下的矩阵,用字符串表示 例如：'1-11-1',用它来做索引
-            """
-            if all(plays.get((player, S_mat)) for p, S, S_mat in moves_states):
-                # UCT算法 upper confrence bound apply into tree
-                log_total = math.log(
-                    sum(plays[(player, S_mat)] for p, S, S_mat in moves_states))
-                value, move, state, state_mat = max([((wins[(player, S_mat)] / plays[(player, S_mat)]) +
-                self.C * math.sqrt(log_total / plays[(player, S_mat)]), p, S, S_mat)
-                for p, S,S_mat in moves_states]
-                ,Key =lambda x : x[0])
+
+    def set_root(self, board: Board) -> bool:
+        """
+        把 board 设为根节点，上一步搜索过的局面（包括对手的应着）仍在表中，
+        直接复用；返回是否复用
+        """
+        key = board.key
+        root = self.table.get(key)
+        reused = root is not None
+        if root is None:
+            root = Node(-board.color, legal_moves(board))
+            if self.knowledge is not None:
+                self.knowledge.warm(key, root)
+            self.table.put(key, root)
+        self.root = root
+        return reused
+
+    def search(self, board: Board, budget: Budget = None) -> int:
+        """ 从 board 搜索到预算用完（至少一次模拟），返回模拟次数 """
+        if budget is None:
+            budget = self.time_control.start(board)
+        self.max_depth = 0
+        self.depth_sum = 0
+        self.expanded = 0
+        self.table.new_search()
+        self.reused = self.root.plays if self.set_root(board) else 0
+        early_stop = self.time_control.early_stop
+        games = 0
+        while True:
+            self.run_simulation(board)
+            games += 1
+            if budget.expired(games) or self.root.proven:
+                break
+            if early_stop and games & 63 == 0 and budget.can_stop(games, self.root_lead()):
+                break
+        return games
+
+    def ponder(self, board: Board, budget: Budget) -> int:
+        """
+        后台思考：对手走棋时在 board 上一直搜索，直到 budget.stop()；
+        统计留在置换表中，对手走完后 get_play 从实际局面的子树继续
+        """
+        return self.search(board, budget)
+
+    def root_lead(self) -> float:
+        """ 根节点访问最多的走法比次多的多出的模拟次数 """
+        best = second = 0
+        for key in self.root.child_keys:
+            child = self.table.entries.get(key)
+            plays = child.plays if child is not None else 0
+            if plays > best:
+                best, second = plays, best
+            elif plays > second:
+                second = plays
+        return (best - second) / self.batch
+
+    def root_stats(self) -> dict:
+        """ 根节点各走法的统计：{压缩的走法: (plays, wins)} """
+        stats = {}
+        for move, key in zip(self.root.child_moves, self.root.child_keys):
+            child = self.table.entries.get(key)
+            if child is not None and child.plays > 0:
+                stats[move] = (child.plays, child.wins)
+        return stats
+
+    def root_proofs(self, player: int) -> tuple:
+        """ 根节点已证明必胜的一个走法（没有则为 None）与已证明必败的走法集合 """
+        won, lost = None, set()
+        for move, key in zip(self.root.child_moves, self.root.child_keys):
+            child = self.table.entries.get(key)
+            if child is None or not child.proven:
+                continue
+            if child.proven == player:
+                won = move
             else:
-                # Otherwise, just make an arbitrary decision.
-                move, state, state_mat = random.choice(moves_states)
-            """
-            #flag = True
-            if flag == True:
-                for p,S,S_mat in moves_states:
-                    if not (plays.get((player,S_mat))):
-                        move = p
-                        state = S
-                        state_mat = S_mat
-                        flag = False
-                        break
+                lost.add(move)
+        return won, lost
+
+    def end_game(self) -> int:
+        """
+        对局结束：把置换表中本局新增的统计写回 knowledge，返回写入的局面数；
+        总时间重新开始
+        """
+        self.time_control.new_game()
+        if self.knowledge is None:
+            return 0
+        return self.knowledge.merge(self.table.entries.items())
+
+    def close(self) -> None:
+        """ 结束根并行的子进程 """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def select_child(self, node: Node):
+        """
+        UCT算法 upper confidence bound apply into tree
+
+        返回 (下标, 子节点)；子节点已被淘汰时返回 (下标, None)，需要重新展开
+        """
+        table = self.table
+        log_total = math.log(node.plays)
+        best, best_index, best_value = None, -1, -1.0
+        lost = None
+        for i, key in enumerate(node.child_keys):
+            child = table.get(key)
+            if child is None or child.plays == 0:
+                return i, None
+            if child.proven:
+                if child.proven == child.player:
+                    return i, child  # 已证明必胜
+                lost = i, child  # 已证明必败，只在没有别的走法时才选
+                continue
+            value = child.wins / child.plays + self.C * math.sqrt(
+                log_total / child.plays
+            )
+            if value > best_value:
+                best, best_index, best_value = child, i, value
+        if best is None:
+            return lost
+        return best_index, best
+
+    def run_simulation(self, board: Board):
+        # 在同一个棋盘上用 push/pop 沿树向下走，结束后恢复
+        path, colors = self.descend(board)
+
+        depth = len(path) - 1
+        self.depth_sum += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+        plays, wins = self.simulate(board, path[-1])
+        self.backpropagate(path, colors, plays, wins)
+        for _ in range(depth):
+            board.pop()
+
+    def descend(self, board: Board) -> tuple:
+        """
+        selection：从根节点沿树向下走到叶节点，途中展开一个新节点后停止；
+        棋盘停在叶节点的局面。返回 (路径上的节点, 各局面的走棋方)
+        """
+        table = self.table
+        node = self.root
+        path = [node]
+        colors = [board.color]  # 路径上各局面的走棋方
+        on_path = {board.key}
+
+        while True:
+            if node.proven:
+                break  # 胜负已定，不必再向下
+            if node.untried:
+                # expansion: 随机展开一个未尝试的走法
+                i = random.randrange(len(node.untried))
+                move = node.untried[i]
+                node.untried[i] = node.untried[-1]
+                node.untried.pop()
+                node.child_moves.append(move)
+                node.child_keys.append(0)
+                i = len(node.child_keys) - 1
+                child = None
+            elif node.child_keys:
+                # selection: 所有子节点都展开过的节点才使用 UCT
+                i, child = self.select_child(node)
+                move = node.child_moves[i]
             else:
-                move, state, state_mat = random.choice(moves_states)
-            if flag == True:
-                # UCT算法 upper confrence bound apply into tree
-                log_total = math.log(
-                    sum(plays[(player, S_mat)] for p, S, S_mat in moves_states)
-                )
-                value, move, state, state_mat = max(
-                    [
-                        (
-                            (wins[(player, S_mat)] / plays[(player, S_mat)])
-                            + self.C * math.sqrt(log_total / plays[(player, S_mat)]),
-                            p,
-                            S,
-                            S_mat,
-                        )
-                        for p, S, S_mat in moves_states
-                    ],
-                    key=lambda x: x[0],
-                )
-            states_copy.append(state)
+                break  # terminal
+
+            player = board.color
+            board.push(*unpack_move(move))
+            key = board.key
+            if child is None:
+                node.child_keys[i] = key
+                child = table.get(key)  # 可能经由其他走法到达过
+                if child is None:
+                    path.append(self.expand(board, player, key))
+                    colors.append(board.color)
+                    break
+            path.append(child)
+            colors.append(board.color)
+            node = child
+            # 局面可能重复出现，回到路径上的局面时停止向下
+            if key in on_path:
+                break
+            on_path.add(key)
+        return path, colors
+
+    def expand(self, board: Board, player: int, key: int) -> Node:
+        """ expansion：为 player 刚走到的局面 board 建立节点并放入置换表 """
+        child = Node(player, legal_moves(board))
+        if board.is_terminal:
+            child.proven = -board.color
+        if self.knowledge is not None:
+            self.knowledge.warm(key, child)
+        self.table.put(key, child)
+        self.expanded += 1
+        return child
+
+    def simulate(self, board: Board, leaf: Node) -> tuple:
+        """ simulation：从叶节点的局面估计胜负，返回 (局数, {颜色: 胜场}) """
+        if leaf.proven:
+            return self.batch, {leaf.proven: self.batch}
+        if self.batch > 1:
+            return self.rollout_batch(board)
+        if self.rollout_depth is not None:
+            return 1, self.rollout_truncated(board)
+        return 1, {self.rollout(board): 1}
 
-            # 'player' here and below refers to the player
-            # who moved into that particular state
-            if expand and (player, state_mat) not in self.plays:
-                expand = False
-                self.plays[(player, state_mat)] = 0
-                self.wins[(player, state_mat)] = 0
-                if t > self.max_depth:
-                    self.max_depth = t
+    def backpropagate(self, path: list, colors: list, plays: int, wins: dict) -> None:
+        for node in path:
+            node.plays += plays
+            node.wins += wins.get(node.player, 0)
+        if path[-1].proven:
+            self.prove(path, colors)
 
+    def prove(self, path: list, colors: list) -> None:
+        """
+        MCTS-Solver：叶节点的胜负已定时按 minimax 向上传播。
+        走棋方有一个必胜的子节点则本节点必胜；所有走法都已展开
+        且子节点全部必败时本节点必败；否则停止
+        """
+        entries = self.table.entries
+        for i in range(len(path) - 2, -1, -1):
+            node, child, side = path[i], path[i + 1], colors[i]
+            if node.proven:
+                break
+            if child.proven == side:
+                node.proven = side
+            elif child.proven == -side and not node.untried:
+                for key in node.child_keys:
+                    other = entries.get(key)
+                    if other is None or other.proven != -side:
+                        return
+                node.proven = -side
+            else:
+                break
 
-            visited_states.add((player, state_mat))
+    def rollout(self, board: Board) -> int:
+        """ 随机走子直到终局，返回胜者；max_moves 步内未结束则返回 0 """
+        state = board.clone()
+        for t in range(self.max_moves):
+            if state.is_terminal:
+                break
+            state.exec(*state.random_step())
+        if state.is_terminal:
+            return -state.color
+        return 0
 
-            player = state.color
-        
+    def rollout_truncated(self, board: Board) -> dict:
+        """
+        随机走至多 rollout_depth 步，未到终局则用 evaluate 估值；
+        返回 {颜色: 胜场}，胜场可以是小数
+        """
+        state = board.clone()
+        for t in range(self.rollout_depth):
             if state.is_terminal:
-                winner = -player
-                # print(winner)
                 break
+            state.exec(*state.random_step())
+        p = evaluate(state)
+        return {B: p, W: 1.0 - p}
+
+    def rollout_batch(self, board: Board) -> tuple:
+        """ 从 board 同时跑 batch 局随机对局，返回 (局数, {胜者: 胜局数}) """
+        winners = self.batch_rollout([board] * self.batch, self.max_moves).run()
+        return self.batch, {B: int((winners == B).sum()), W: int((winners == W).sum())}
 
-        for player, state_mat in visited_states:
-            if (player, state_mat) not in self.plays:
-                continue
-            
-            self.plays[(player, state_mat)] += 1
-            if player == winner:
-                
-                self.wins[(player, state_mat)] += 1
     def exec(self,board:Board) -> (tuple,tuple):
-        
+
         move,t,_ = self.get_play(board)
         source = move
         target = t
@@ -219,4 +566,3 @@ if __name__ == "__main__":
         #print(mc.plays)
         mc.update(next_state)
 """
-
@@ -1,6 +1,8 @@
-from copy import deepcopy
-from env.board import Board
+from env.board import B, Board
 from .mcts_git import mcts
+from .book import book_move, open_book
+from .telemetry import make_sink, peak_memory
+from .timecontrol import INF, TimeControl, clock
 
 
 class GameState():
@@ -16,28 +18,73 @@ class GameState():
 
     def takeAction(self, action):
         source, target = action
-        board = deepcopy(self.board)
+        board = self.board.clone()
         board.exec(source, target)
         return GameState(board)
 
     def isTerminal(self):
         return self.board.is_terminal
 
+    def getCurrentPlayer(self):
+        return 1 if self.board.color == B else -1
 
     def getReward(self):
-        return (
-            self.board.counts[self.board.color] > self.board.counts[-self.board.color]
-        )
+        """ 以黑方为准：黑胜 1，白胜 -1，未到终局 0 """
+        if not self.board.is_terminal:
+            return 0
+        return 1 if self.board.color != B else -1
+
+
+def rollout(state: GameState, max_moves: int = 1000):
+    """ 在棋盘的副本上随机走到终局，不为每一步创建 GameState """
+    board = state.board.clone()
+    for _ in range(max_moves):
+        if board.is_terminal:
+            break
+        board.exec(*board.random_step())
+    return GameState(board).getReward()
 
 
 class MCTSEngine():
-    def __init__(self):
-        pass
+    def __init__(self, **options):
+        self.time_control = TimeControl.from_options(options, nodes=50)
+        self.book = open_book(options)
+        self.node_limit = options.get("node_limit")  # 树的节点数上限
+        self.telemetry = make_sink(options.get("telemetry"))
+        self.stats = None  # 上一步的 MoveStats
+
+    def end_game(self) -> None:
+        """ 对局结束，总时间重新开始 """
+        self.time_control.new_game()
 
     def exec(self, board: Board) -> (tuple, tuple):
-        game_state =  GameState(deepcopy(board))
-        m = mcts(iterationLimit=50)
-        return m.search(initialState=game_state)
+        start = clock()
+        hit, record = book_move(self.book, board, "mcts_engine", self.telemetry)
+        self.stats = record
+        if hit is not None:
+            return hit
+        game_state =  GameState(board.clone())
+        budget = self.time_control.start(board)
+        m = mcts(
+            timeLimit=None if budget.seconds == INF else budget.seconds * 1000,
+            iterationLimit=None if budget.nodes == INF else int(budget.nodes),
+            nodeLimit=self.node_limit,
+            rolloutPolicy=rollout,
+        )
+        action = m.search(initialState=game_state)
+        record.times["search"] = budget.elapsed()
+        self.time_control.finish(budget)
+
+        record.move = action
+        record.simulations = record.playouts = m.numIterations
+        record.nodes = m.numNodes
+        record.max_depth = m.maxDepth
+        record.seconds = clock() - start
+        record.memory = peak_memory()
+        self.telemetry.emit(record)
+        if action is None:
+            return None, None
+        return action
 
 
 engine = MCTSEngine
@@ -0,0 +1,166 @@
+"""
+通用的 MCTS，接口与 pip 上的 mcts 包相同：
+
+    searcher = mcts(timeLimit=毫秒) 或 mcts(iterationLimit=次数)
+    action = searcher.search(initialState=state)
+
+state 需要实现 getPossibleActions()、takeAction(action)、isTerminal()、getReward()；
+可以实现 getCurrentPlayer()，返回 1 或 -1，此时 getReward() 以玩家 1 为准，
+各层按走棋方取正负；没有时总是最大化 getReward()。
+
+与原包的不同：
+    - 子节点逐个展开，第一次展开时才调用 getPossibleActions()，
+      每次只对一个动作调用 takeAction()，走过的动作直接复用子节点中的局面
+    - 还可以用 nodeLimit 限制树的节点数，几种限制可以同时给，先到为准
+    - 最后选访问次数最多的动作，而不是平均回报最高的
+"""
+import math
+import random
+import time
+
+
+def randomPolicy(state):
+    while not state.isTerminal():
+        action = random.choice(state.getPossibleActions())
+        state = state.takeAction(action)
+    return state.getReward()
+
+
+class treeNode(object):
+    __slots__ = (
+        "state",
+        "isTerminal",
+        "parent",
+        "numVisits",
+        "totalReward",
+        "children",
+        "untried",
+        "player",
+    )
+
+    def __init__(self, state, parent):
+        self.state = state
+        self.isTerminal = state.isTerminal()
+        self.parent = parent
+        self.numVisits = 0
+        self.totalReward = 0
+        self.children = {}
+        self.untried = None  # 尚未展开的动作，第一次展开时才取
+        self.player = 1
+
+    @property
+    def isFullyExpanded(self) -> bool:
+        return self.isTerminal or (self.untried is not None and not self.untried)
+
+
+class mcts(object):
+    def __init__(
+        self,
+        timeLimit=None,
+        iterationLimit=None,
+        nodeLimit=None,
+        explorationConstant=1 / math.sqrt(2),
+        rolloutPolicy=randomPolicy,
+    ):
+        if timeLimit is None and iterationLimit is None and nodeLimit is None:
+            raise ValueError("Must have a time, iteration or node limit")
+        if iterationLimit is not None and iterationLimit < 1:
+            raise ValueError("Iteration limit must be greater than one")
+        self.timeLimit = timeLimit  # 毫秒
+        self.iterationLimit = iterationLimit
+        self.nodeLimit = nodeLimit
+        self.explorationConstant = explorationConstant
+        self.rollout = rolloutPolicy
+        self.root = None
+        self.numNodes = 0
+        self.numIterations = 0
+        self.maxDepth = 0
+
+    def search(self, initialState):
+        """ 返回选中的动作；初始局面没有可走的动作时返回 None """
+        self.root = treeNode(initialState, None)
+        self.numNodes = 1
+        self.numIterations = 0
+        self.maxDepth = 0
+
+        deadline = math.inf
+        if self.timeLimit is not None:
+            deadline = time.monotonic() + self.timeLimit / 1000
+        iterations = math.inf if self.iterationLimit is None else self.iterationLimit
+        nodes = math.inf if self.nodeLimit is None else self.nodeLimit
+        while True:
+            self.executeRound()
+            self.numIterations += 1
+            if (
+                self.numIterations >= iterations
+                or self.numNodes >= nodes
+                or time.monotonic() >= deadline
+                or self.root.isTerminal
+            ):
+                break
+
+        if not self.root.children:
+            return None
+        best = max(self.root.children.items(), key=lambda item: item[1].numVisits)
+        return best[0]
+
+    def executeRound(self) -> None:
+        node = self.selectNode(self.root)
+        reward = self.rollout(node.state)
+        self.backpropogate(node, reward)
+
+    def selectNode(self, node):
+        depth = 0
+        while not node.isTerminal:
+            depth += 1
+            if node.isFullyExpanded:
+                node = self.getBestChild(node, self.explorationConstant)
+            else:
+                node = self.expand(node)
+                break
+        if depth > self.maxDepth:
+            self.maxDepth = depth
+        return node
+
+    def expand(self, node):
+        """ 随机展开一个未尝试的动作 """
+        if node.untried is None:
+            node.untried = list(node.state.getPossibleActions())
+            if hasattr(node.state, "getCurrentPlayer"):
+                node.player = node.state.getCurrentPlayer()
+            if not node.untried:
+                # 没有动作却不是终局，当作终局处理
+                node.isTerminal = True
+                return node
+        untried = node.untried
+        i = random.randrange(len(untried))
+        action = untried[i]
+        untried[i] = untried[-1]
+        untried.pop()
+        child = treeNode(node.state.takeAction(action), node)
+        node.children[action] = child
+        self.numNodes += 1
+        return child
+
+    def backpropogate(self, node, reward) -> None:
+        while node is not None:
+            node.numVisits += 1
+            node.totalReward += reward
+            node = node.parent
+
+    def getBestChild(self, node, explorationValue: float):
+        """ UCT，各子节点的回报按 node 的走棋方取正负；同分时随机选 """
+        log_total = 2 * math.log(node.numVisits)
+        player = node.player
+        bestValue = -math.inf
+        bestNodes = []
+        for child in node.children.values():
+            value = player * child.totalReward / child.numVisits + explorationValue * math.sqrt(
+                log_total / child.numVisits
+            )
+            if value > bestValue:
+                bestValue = value
+                bestNodes = [child]
+            elif value == bestValue:
+                bestNodes.append(child)
+        return random.choice(bestNodes)
@@ -0,0 +1,338 @@
+"""
+共享树并行 MCTS（tree parallelization）
+
+多个进程沿同一棵树向下搜索。树的统计信息不放在 Python 字典里，而是放在
+multiprocessing.RawArray 组成的开放寻址哈希表中，所有进程共享。节点以
+(走子方, 走完后的局面) 的 zobrist 键索引，与原来的 (player, state) 索引含义相同。
+
+进程在向下走时给经过的节点加上虚拟损失（virtual loss）：在 backpropagation
+之前先把访问次数加上，胜场不加，使其他进程暂时避开这条路线，分散到别的分支。
+统计的更新不加锁，偶尔丢失一次计数对搜索无害；只有插入新节点时加锁。
+丢失的虚拟损失增减会累积，因此每步开始时把虚拟损失清零，选择时也不信任
+小于等于 0 的访问次数。
+"""
+import ctypes
+import sys
+import random
+import math
+import multiprocessing
+
+sys.path.append("..")
+from env.board import Board, ZOBRIST_W, W
+from engines.book import book_move, open_book
+from engines.telemetry import make_sink, peak_memory
+from engines.timecontrol import TimeControl, clock
+from engines.ttable import MB
+
+# 每个槽位：键 8 字节 + plays、wins、virtual 各 4 字节 + player 1 字节
+SLOT_BYTES = 21
+MAX_PROBES = 16
+
+
+class SharedTable(object):
+    """ 进程间共享的统计表，容量为 2 的幂 """
+
+    def __init__(self, max_bytes: int):
+        capacity = 1
+        while capacity * 2 * SLOT_BYTES <= max_bytes:
+            capacity *= 2
+        self.mask = capacity - 1
+        self.keys = multiprocessing.RawArray("Q", capacity)  # 0 表示空槽
+        self.plays = multiprocessing.RawArray("i", capacity)
+        self.wins = multiprocessing.RawArray("i", capacity)
+        self.virtual = multiprocessing.RawArray("i", capacity)
+        self.player = multiprocessing.RawArray("b", capacity)
+        self.used = multiprocessing.RawValue("i", 0)
+        self.lock = multiprocessing.Lock()
+
+    def __len__(self):
+        return self.used.value
+
+    def find(self, key: int) -> int:
+        """ 返回键所在的槽位，不存在返回 -1 """
+        keys = self.keys
+        mask = self.mask
+        for i in range(MAX_PROBES):
+            slot = (key + i) & mask
+            k = keys[slot]
+            if k == key:
+                return slot
+            if k == 0:
+                return -1
+        return -1
+
+    def insert(self, key: int, player: int) -> int:
+        """ 插入新节点并返回槽位，表满（探测不到空槽）时返回 -1 """
+        with self.lock:
+            keys = self.keys
+            for i in range(MAX_PROBES):
+                slot = (key + i) & self.mask
+                k = keys[slot]
+                if k == key:
+                    return slot
+                if k == 0:
+                    self.plays[slot] = 0
+                    self.wins[slot] = 0
+                    self.virtual[slot] = 0
+                    self.player[slot] = player
+                    keys[slot] = key
+                    self.used.value += 1
+                    return slot
+        return -1
+
+    def reset_virtual(self) -> None:
+        """ 清零所有虚拟损失，只在没有进程搜索时调用 """
+        ctypes.memset(self.virtual, 0, ctypes.sizeof(self.virtual))
+
+    def clear(self) -> None:
+        with self.lock:
+            for arr in (self.keys, self.plays, self.wins, self.virtual):
+                arr[:] = [0] * len(arr)
+            self.used.value = 0
+
+
+def child_key(board: Board, source: tuple, target: tuple) -> int:
+    """ (走子方, 走完后的局面) 的键，无需真的走这一步 """
+    key = board.hash_after(source, target)
+    if board.color == W:
+        key ^= ZOBRIST_W
+    return key or 1  # 0 留给空槽
+
+
+def search_worker(table: SharedTable, board: Board, deadline, nodes: float, options: dict):
+    """
+    一个进程的搜索循环：直到 deadline.value 或做满 nodes 次模拟，
+    返回 (模拟次数, 各次模拟的深度之和, 最大深度)；
+    deadline 是共享的 RawValue，主进程提前结束时把它置 0
+    """
+    searcher = TreeSearch(table, options)
+    games = 0
+    while games < nodes and clock() < deadline.value:
+        searcher.run_simulation(board)
+        games += 1
+    return games, searcher.depth_sum, searcher.max_depth
+
+
+def _process_main(table, board, deadline, nodes, options, counter):
+    random.seed()  # fork 出的子进程会继承父进程的随机数状态
+    games, depth_sum, max_depth = search_worker(table, board, deadline, nodes, options)
+    with counter.get_lock():
+        counter[0] += games
+        counter[1] += depth_sum
+        counter[2] = max(counter[2], max_depth)
+
+
+class TreeSearch(object):
+    """ 在共享表上做一次次模拟，每个进程一个 """
+
+    def __init__(self, table: SharedTable, options: dict):
+        self.table = table
+        self.C = options.get("C", 1.414)
+        self.virtual_loss = options.get("virtual_loss", 1)
+        self.max_moves = options.get("move", 1000)
+        self.max_depth = 0
+        self.depth_sum = 0
+
+    def select(self, slots: list) -> int:
+        """ UCT，访问次数中计入虚拟损失 """
+        table = self.table
+        plays, wins, virtual = table.plays, table.wins, table.virtual
+        total = 0
+        for slot in slots:
+            total += plays[slot] + virtual[slot]
+        log_total = math.log(max(total, 1))
+        best, best_value = 0, -1.0
+        for i, slot in enumerate(slots):
+            n = plays[slot] + virtual[slot]
+            if n <= 0:
+                # 并发更新丢失时可能为负，当作未访问
+                return i
+            value = wins[slot] / n + self.C * math.sqrt(log_total / n)
+            if value > best_value:
+                best, best_value = i, value
+        return best
+
+    def run_simulation(self, root: Board):
+        table = self.table
+        board = root.clone()
+        path = []
+        expanded = False
+        for depth in range(self.max_moves):
+            if board.is_terminal:
+                break
+            player = board.color
+            moves = [
+                (source, target)
+                for source, targets in board.avail_steps[player].items()
+                for target in targets
+            ]
+            keys = [child_key(board, s, t) for s, t in moves]
+            slots = [table.find(key) for key in keys]
+
+            unexpanded = [i for i, slot in enumerate(slots) if slot < 0]
+            if unexpanded:
+                # expansion: 所有子节点都展开过之前随机展开一个
+                i = random.choice(unexpanded)
+                slot = table.insert(keys[i], player)
+                expanded = True
+            else:
+                # selection
+                i = self.select(slots)
+                slot = slots[i]
+
+            board.exec(*moves[i])
+            if slot >= 0:
+                table.virtual[slot] += self.virtual_loss
+                path.append(slot)
+            if expanded or slot < 0:
+                break
+
+        self.depth_sum += len(path)
+        if len(path) > self.max_depth:
+            self.max_depth = len(path)
+
+        # simulation
+        winner = self.rollout(board)
+
+        # backpropagation，同时撤销虚拟损失
+        plays, wins, virtual, owner = table.plays, table.wins, table.virtual, table.player
+        for slot in path:
+            plays[slot] += 1
+            virtual[slot] -= self.virtual_loss
+            if owner[slot] == winner:
+                wins[slot] += 1
+
+    def rollout(self, state: Board) -> int:
+        """ 随机走子直到终局，返回胜者；max_moves 步内未结束则返回 0 """
+        for t in range(self.max_moves):
+            if state.is_terminal:
+                break
+            state.exec(*state.random_step())
+        if state.is_terminal:
+            return -state.color
+        return 0
+
+
+class SharedTreeMonteCarlo(object):
+    def __init__(self, **kwargs):
+        self.time_control = TimeControl.from_options(kwargs, time=55)
+        self.workers = kwargs.get("workers", 1)
+        self.options = {
+            "C": kwargs.get("C", 1.414),
+            "virtual_loss": kwargs.get("virtual_loss", 1),
+            "move": kwargs.get("move", 1000),
+        }
+        self.table = SharedTable(int(kwargs.get("table_mb", 64) * MB))
+        self.book = open_book(kwargs)
+        self.telemetry = make_sink(kwargs.get("telemetry"))
+        self.stats = None  # 上一步的 MoveStats
+        self.games = 0
+
+    def get_play(self, board: Board):
+        player = board.color
+        if not board.avail_steps[player]:
+            return None, None
+        start = clock()
+        hit, record = book_move(self.book, board, "mcts_shared", self.telemetry)
+        self.stats = record
+        if hit is not None:
+            return hit
+
+        # 表中局面以 zobrist 键区分，跨步保留；快满时清空
+        if len(self.table) > (self.table.mask + 1) * 3 // 4:
+            self.table.clear()
+        else:
+            self.table.reset_virtual()
+        used = len(self.table)
+
+        moves = [
+            (source, target)
+            for source, targets in board.avail_steps[player].items()
+            for target in targets
+        ]
+        keys = [child_key(board, s, t) for s, t in moves]
+
+        budget = self.time_control.start(board)
+        deadline = multiprocessing.RawValue("d", budget.deadline)
+        nodes = budget.nodes / self.workers
+        # 其他进程的 [模拟次数, 深度之和, 最大深度]
+        counter = multiprocessing.Array("l", 3)
+        processes = [
+            multiprocessing.Process(
+                target=_process_main,
+                args=(self.table, board, deadline, nodes, self.options, counter),
+            )
+            for _ in range(self.workers - 1)
+        ]
+        for p in processes:
+            p.start()
+        games = depth_sum = max_depth = 0
+        while games < nodes and clock() < deadline.value:
+            # 分段搜索，每段之间检查根节点：最优走法已不可能被超过时让所有进程停下
+            n, depths, deepest = search_worker(
+                self.table, board, deadline, min(nodes - games, 256), self.options
+            )
+            games += n
+            depth_sum += depths
+            max_depth = max(max_depth, deepest)
+            lead = self.root_lead(keys)
+            if self.time_control.early_stop and budget.can_stop(games * self.workers, lead):
+                deadline.value = 0.0
+        record.times["search"] = budget.elapsed()
+        for p in processes:
+            p.join()
+        record.times["join"] = budget.elapsed() - record.times["search"]
+        self.games = games + counter[0]
+        self.time_control.finish(budget)
+
+        best, best_plays = None, -1
+        for move, key in zip(moves, keys):
+            slot = self.table.find(key)
+            if slot < 0:
+                continue
+            plays = self.table.plays[slot]
+            if plays > 0:
+                record.moves.append(move + (plays, self.table.wins[slot]))
+            if plays > best_plays:
+                best, best_plays = move, plays
+        if best is None:
+            # 表满，根节点的子节点都没能插入
+            best = board.random_step()
+
+        record.move = best
+        record.simulations = record.playouts = self.games
+        record.nodes = len(self.table) - used
+        record.max_depth = max(max_depth, counter[2])
+        record.avg_depth = (depth_sum + counter[1]) / max(self.games, 1)
+        record.seconds = clock() - start
+        record.table = {
+            "size": len(self.table),
+            "capacity": self.table.mask + 1,
+            "bytes": (self.table.mask + 1) * SLOT_BYTES,
+        }
+        record.memory = peak_memory()
+        record.moves.sort(key=lambda m: m[2], reverse=True)
+        self.telemetry.emit(record)
+        return best
+
+    def root_lead(self, keys: list) -> int:
+        """ 根节点访问最多的走法比次多的多出的模拟次数 """
+        best = second = 0
+        for key in keys:
+            slot = self.table.find(key)
+            plays = self.table.plays[slot] if slot >= 0 else 0
+            if plays > best:
+                best, second = plays, best
+            elif plays > second:
+                second = plays
+        return best - second
+
+    def end_game(self) -> None:
+        """ 对局结束，总时间重新开始 """
+        self.time_control.new_game()
+
+    def exec(self, board: Board) -> (tuple, tuple):
+        return self.get_play(board)
+
+
+engine = SharedTreeMonteCarlo
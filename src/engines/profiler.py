@@ -0,0 +1,80 @@
+"""
+搜索的分阶段计时
+
+instrument(obj, phases) 把对象的若干方法换成计时的包装，记录每个阶段的调用
+次数、总用时和除去内层阶段的自身用时。包装只装在打开了计时的引擎实例上，
+关闭时方法原样调用，没有任何开销。
+
+阶段可以嵌套，按调用栈区分，如 "simulation;selection;expansion"。
+folded() 输出 flamegraph.pl、speedscope 等工具使用的 folded stacks 格式：
+每行一个调用栈和它的自身用时（微秒），同一个栈出现多次时由工具相加。
+"""
+import time
+
+clock = time.perf_counter
+
+
+class Profiler(object):
+    def __init__(self):
+        self.stack = []  # 当前正在计时的 [调用栈, 内层阶段用时]
+        self.phases = {}  # 调用栈 -> [调用次数, 总用时, 自身用时]
+
+    def wrap(self, name: str, method):
+        stack = self.stack
+        phases = self.phases
+
+        def timed(*args, **kwargs):
+            path = stack[-1][0] + ";" + name if stack else name
+            frame = [path, 0.0]
+            stack.append(frame)
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                entry = phases.get(path)
+                if entry is None:
+                    entry = phases[path] = [0, 0.0, 0.0]
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += elapsed - frame[1]
+
+        return timed
+
+    def instrument(self, obj, phases: dict) -> None:
+        """ phases: {方法名: 阶段名} """
+        for method, name in phases.items():
+            setattr(obj, method, self.wrap(name, getattr(obj, method)))
+
+    def reset(self) -> None:
+        self.phases.clear()
+
+    def summary(self) -> dict:
+        """ {调用栈: {"calls", "seconds", "self"}} """
+        return {
+            path: {"calls": calls, "seconds": seconds, "self": own}
+            for path, (calls, seconds, own) in self.phases.items()
+        }
+
+    def lines(self) -> list:
+        """ 可读的表格，按自身用时从多到少，百分比相对于所有阶段的自身用时之和 """
+        total = sum(entry[2] for entry in self.phases.values()) or 1.0
+        lines = []
+        for path, (calls, seconds, own) in sorted(
+            self.phases.items(), key=lambda item: item[1][2], reverse=True
+        ):
+            lines.append(
+                "%5.1f %% %9.3f s self %9.3f s total %9d calls  %s"
+                % (100 * own / total, own, seconds, calls, path)
+            )
+        return lines
+
+    def folded(self) -> list:
+        return [
+            "%s %d" % (path, round(own * 1e6))
+            for path, (_, _, own) in self.phases.items()
+            if own > 0
+        ]
@@ -0,0 +1,175 @@
+"""
+搜索统计（telemetry）
+
+搜索引擎每走一步填一条 MoveStats，交给选项 telemetry 指定的输出（sink）：
+
+    None（默认）: 打印到标准输出
+    "":          不输出
+    文件路径:     每步追加一行 JSON（JSON lines）
+    可调用对象:   以 MoveStats 为参数调用，界面用它更新状态栏
+    列表:         以上几种同时使用
+
+引擎的 stats 属性保存最近一步的统计。
+"""
+import json
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory() -> int:
+    """ 本进程的内存峰值（字节），无法取得时为 0 """
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位是 KB，macOS 上是字节
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class MoveStats(object):
+    """
+    一步棋的搜索统计
+
+    simulations: 模拟次数（MCTS）；playouts: 随机对局数，batch 时是模拟次数的倍数
+    nodes: 新展开的节点数（MCTS）或搜索过的节点数（alpha-beta）
+    max_depth / avg_depth: 树中的最大 / 平均深度，alpha-beta 为完成的迭代深度
+    table: 置换表的 stats()；memory: 进程内存峰值（字节）
+    times: 各阶段用时（秒），如 {"book": ..., "search": ..., "merge": ...}
+    moves: 根节点各走法 [(source, target, plays, wins)]，按 plays 从大到小
+    extra: 引擎特有的其他数值
+    """
+
+    __slots__ = (
+        "engine",
+        "color",
+        "move",
+        "simulations",
+        "playouts",
+        "nodes",
+        "seconds",
+        "max_depth",
+        "avg_depth",
+        "table",
+        "memory",
+        "times",
+        "moves",
+        "extra",
+    )
+
+    def __init__(self, engine: str, color: int):
+        self.engine = engine
+        self.color = color
+        self.move = None
+        self.simulations = 0
+        self.playouts = 0
+        self.nodes = 0
+        self.seconds = 0.0
+        self.max_depth = 0
+        self.avg_depth = 0.0
+        self.table = {}
+        self.memory = 0
+        self.times = {}
+        self.moves = []
+        self.extra = {}
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["playouts_per_second"] = self.playouts_per_second
+        data["nodes_per_second"] = self.nodes_per_second
+        return data
+
+    def summary(self) -> str:
+        """ 一行摘要，用于状态栏 """
+        if self.extra.get("book"):
+            return "%s: book move" % self.engine
+        if self.playouts:
+            rate = "%d playouts, %.0f/s" % (self.playouts, self.playouts_per_second)
+        else:
+            rate = "%d nodes, %.0f/s" % (self.nodes, self.nodes_per_second)
+        return "%s: %s, depth %d, %.2f s" % (self.engine, rate, self.max_depth, self.seconds)
+
+    def lines(self) -> list:
+        """ 多行的可读文本，用于打印 """
+        lines = [self.summary()]
+        if self.move is not None:
+            lines.append("Move: {} -> {}".format(*self.move))
+        if self.times:
+            lines.append(
+                "Time: " + ", ".join("%s %.2f s" % item for item in self.times.items())
+            )
+        if self.table:
+            lines.append("Table: %s" % self.table)
+        if self.memory:
+            lines.append("Memory: %.1f MB" % (self.memory / (1024 * 1024)))
+        for name, value in self.extra.items():
+            if isinstance(value, dict):
+                lines.append("%s:" % name)
+                lines.extend("    %s: %s" % item for item in value.items())
+            else:
+                lines.append("%s: %s" % (name, value))
+        for source, target, plays, wins in self.moves:
+            lines.append(
+                "{} -> {}: {:.2f} % ({:g} / {})".format(
+                    source, target, 100 * wins / plays, wins, plays
+                )
+            )
+        return lines
+
+
+class PrintSink(object):
+    def emit(self, stats: MoveStats) -> None:
+        print("\n".join(stats.lines()))
+
+
+class JsonLinesSink(object):
+    """ 每步追加一行 JSON；每次打开再关闭，多个进程可以写同一个文件 """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def emit(self, stats: MoveStats) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(stats.to_dict()) + "\n")
+
+
+class CallbackSink(object):
+    def __init__(self, callback):
+        self.callback = callback
+
+    def emit(self, stats: MoveStats) -> None:
+        self.callback(stats)
+
+
+class Sinks(object):
+    """ 同时输出到多个 sink；空列表即不输出 """
+
+    def __init__(self, sinks: list):
+        self.sinks = sinks
+
+    def emit(self, stats: MoveStats) -> None:
+        for sink in self.sinks:
+            sink.emit(stats)
+
+
+def make_sink(spec):
+    """ 按选项 telemetry 的值构造 sink，含义见模块说明 """
+    if spec is None:
+        return PrintSink()
+    if isinstance(spec, (list, tuple)):
+        return Sinks([make_sink(s) for s in spec])
+    if callable(spec):
+        return CallbackSink(spec)
+    if not spec:
+        return Sinks([])
+    return JsonLinesSink(spec)
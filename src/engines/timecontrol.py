@@ -0,0 +1,147 @@
+"""
+搜索预算（time control），所有搜索引擎共用
+
+引擎选项：
+    time: 每步时间上限（秒）
+    game_time / increment: 整局总时间与每步加时（秒），引擎自己记账
+    nodes: 每步模拟（节点）次数上限
+    moves_to_go: 按总时间分配时估计的剩余步数
+    early_stop: 最优走法已不可能被超过时提前结束
+
+每一步开始时 start(board) 得到 Budget，搜索中用 expired() / can_stop() 判断
+是否停止，走完后 finish(budget) 扣除用时。时间一律用 time.monotonic。
+同一个引擎下下一局之前调用 new_game()，把总时间恢复为 game_time。
+后台思考（ponder）用不限时的 Budget()，由界面调用 stop() 结束，不计入用时。
+"""
+import time
+
+from env.board import B, W
+
+clock = time.monotonic
+
+INF = float("inf")
+MOVES_TO_GO = 30
+# 单步最多用掉剩余时间的比例，以及留给界面与进程调度的余量（秒）
+MAX_FRACTION = 0.25
+SAFETY = 0.05
+
+
+def phase_weight(board) -> float:
+    """
+    按局面阶段调整分配的时间：开局走法多而差别小，少用时间；
+    中局双方都已有吃子、胜负未定，多用时间；残局搜索很快就能收敛
+    """
+    pieces = board.counts[B] + board.counts[W]
+    if pieces >= 22:
+        return 0.6
+    if pieces >= 12:
+        return 1.4
+    return 1.0
+
+
+class Budget(object):
+    """ 一步棋的搜索预算 """
+
+    __slots__ = ("start", "deadline", "nodes")
+
+    def __init__(self, seconds: float = INF, nodes: float = INF):
+        self.start = clock()
+        self.deadline = self.start + seconds
+        self.nodes = nodes
+
+    @property
+    def seconds(self) -> float:
+        return self.deadline - self.start
+
+    def elapsed(self) -> float:
+        return clock() - self.start
+
+    def remaining(self) -> float:
+        return self.deadline - clock()
+
+    def stop(self) -> None:
+        """ 让搜索尽快结束，可以从其他线程调用 """
+        self.deadline = self.start
+
+    def expired(self, done: int) -> bool:
+        return done >= self.nodes or clock() >= self.deadline
+
+    def can_stop(self, done: int, lead: float) -> bool:
+        """
+        已做 done 次模拟，最优走法比次优多 lead 次访问；
+        按目前的速度，剩余预算全给次优走法也追不上时返回 True
+        """
+        left = self.nodes - done
+        if self.deadline != INF:
+            now = clock()
+            elapsed = now - self.start
+            if elapsed <= 0:
+                return False
+            left = min(left, done * (self.deadline - now) / elapsed)
+        return lead > left
+
+
+class TimeControl(object):
+    def __init__(
+        self,
+        move_time: float = None,
+        game_time: float = None,
+        increment: float = 0.0,
+        nodes: int = None,
+        moves_to_go: int = MOVES_TO_GO,
+        early_stop: bool = True,
+    ):
+        self.move_time = move_time
+        self.game_time = game_time
+        self.remaining = game_time
+        self.increment = increment
+        self.nodes = nodes
+        self.moves_to_go = moves_to_go
+        self.early_stop = early_stop
+
+    @classmethod
+    def from_options(cls, options: dict, time: float = None, nodes: int = None):
+        """
+        从引擎选项构造；time / nodes 是引擎的默认预算，
+        选项中指定了 time、game_time、nodes 中任意一个时不再使用默认值
+        """
+        game_time = options.get("game_time")
+        if any(options.get(k) is not None for k in ("time", "game_time", "nodes")):
+            time, nodes = options.get("time"), options.get("nodes")
+        return cls(
+            move_time=time,
+            game_time=game_time,
+            increment=options.get("increment") or 0.0,
+            nodes=nodes,
+            moves_to_go=options.get("moves_to_go", MOVES_TO_GO),
+            early_stop=options.get("early_stop", True),
+        )
+
+    def allocate(self, board) -> float:
+        """ 本步可用的秒数 """
+        seconds = INF
+        if self.remaining is not None:
+            share = self.remaining / self.moves_to_go * phase_weight(board)
+            seconds = max(
+                min(
+                    share + self.increment,
+                    self.remaining * MAX_FRACTION + self.increment,
+                    self.remaining - SAFETY,
+                ),
+                0.0,
+            )
+        if self.move_time is not None:
+            seconds = min(seconds, self.move_time)
+        return seconds
+
+    def start(self, board) -> Budget:
+        return Budget(self.allocate(board), INF if self.nodes is None else self.nodes)
+
+    def new_game(self) -> None:
+        """ 新的一局，总时间重新开始 """
+        self.remaining = self.game_time
+
+    def finish(self, budget: Budget) -> None:
+        """ 走完一步后扣除用时并加上加时 """
+        if self.remaining is not None:
+            self.remaining = max(self.remaining - budget.elapsed(), 0.0) + self.increment
@@ -0,0 +1,82 @@
+"""
+置换表：容量固定的局面表，供搜索引擎保存每个局面的统计信息
+
+以 Board.key 的 64 位整数为键。表满时按置换策略淘汰一批条目：
+
+    "visits": 淘汰访问次数（entry.plays）最少的条目
+    "age":    淘汰最久没有被访问（entry.age 最小）的条目，同龄时淘汰访问次数少的
+
+条目需要有 plays 和 age 两个可写属性。
+"""
+import heapq
+
+MB = 1024 * 1024
+
+
+class TranspositionTable(object):
+    def __init__(self, max_bytes: int, entry_bytes: int, policy: str = "visits"):
+        """
+        max_bytes: 内存预算
+        entry_bytes: 估计的每个条目（连同字典槽位）占用的字节数
+        """
+        if policy not in ("visits", "age"):
+            raise ValueError("unknown replacement policy: %s" % policy)
+        self.capacity = max(1, max_bytes // entry_bytes)
+        self.entry_bytes = entry_bytes
+        self.policy = policy
+        self.entries = {}
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def new_search(self) -> None:
+        """ 每次搜索开始时调用，此后访问到的条目都比之前的新 """
+        self.age += 1
+
+    def get(self, key: int):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            entry.age = self.age
+        return entry
+
+    def put(self, key: int, entry) -> None:
+        if key not in self.entries and len(self.entries) >= self.capacity:
+            self.evict()
+        entry.age = self.age
+        self.entries[key] = entry
+
+    def evict(self) -> None:
+        """ 一次淘汰 1/16 的条目，把排序的开销分摊到多次插入上 """
+        n = max(1, self.capacity // 16)
+        if self.policy == "visits":
+            score = lambda item: item[1].plays
+        else:
+            score = lambda item: (item[1].age, item[1].plays)
+        for key, _ in heapq.nsmallest(n, self.entries.items(), key=score):
+            del self.entries[key]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "bytes": len(self.entries) * self.entry_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
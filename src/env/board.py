@@ -8,6 +8,9 @@
         1 - 黑棋
        -1 - 白棋
 
+    bits (list): 按颜色索引的位棋盘，bits[B] / bits[W] 为 64 位整数，
+        第 (row * 8 + col) 位为 1 表示该位置有对应颜色的棋子
+
     color (int): 当前准备下棋的颜色
 
     avail_steps (dict): 存储当前黑白方能走的位置
@@ -30,281 +33,660 @@
         }
     
     is_terminal (bool): 是否处于终止状态（双方都无棋可下，或一方棋子仅剩下一颗，或某一方连起来）
+
+    piece_at(loc) -> int: 位置 loc 上的数字，同 matrix，但不需要构造二维数组
+
+    key (int): 局面（含走棋方）的 64 位 zobrist 键，exec 中增量维护，
+        置换表、开局库等都以它为键；hash_state() 仍返回原来的字符串
+
+    features (array): 每方 5 个数，从 FEATURE_BASE[color] 开始：行号之和、列号之和、
+        行号平方和、列号平方和、4 倍欧拉数（8 连通的块数减去洞数），exec 中增量维护，
+        估值时不需要扫描棋盘，见 engines/evaluation.py
+
+    clone() -> Board: 复制棋盘，copy.copy / copy.deepcopy 也使用它
+
+    push(source, target) / pop(): 走一步 / 撤销上一步，用于搜索时不复制棋盘
+
+    random_step() -> (source, target): 均匀随机的一个合法走法，不构造列表，
+        用于随机对局；无棋可走时返回 None
 """
 
+import random
+from array import array
+
 B = 1
 W = -1
 
+# 方向：向右、向左、向下、向上、向右上、向左下、向左上、向右下
+DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0), (-1, 1), (1, -1), (-1, -1), (1, 1))
+
+FULL = (1 << 64) - 1
+
+# initial position as bitboards, bit (row * 8 + col) is set if a piece is there
+BLACK_START = 0x7E0000000000007E
+WHITE_START = 0x0081818181818100
+
+
+def _build_tables():
+    """
+    Build the lookup tables used by move generation, once at import time.
+
+    Lines are numbered 0-7 for rows, 8-15 for columns, 16-30 for the
+    paradiagonals (row + col) and 31-45 for the main diagonals (col - row).
+    """
+    line_masks = [0] * 46
+    square_lines = []
+    for sq in range(64):
+        i, j = divmod(sq, 8)
+        lines = (i, 8 + j, 16 + i + j, 38 + j - i)
+        for line in lines:
+            line_masks[line] |= 1 << sq
+        square_lines.append(lines)
+
+    ray_lines = []
+    rays = []
+    for sq in range(64):
+        i, j = divmod(sq, 8)
+        for d, (d_row, d_col) in enumerate(DIRECTIONS):
+            ray_lines.append(square_lines[sq][d // 2])
+            # ray[n]: (target square, target bit, mask of the squares passed over)
+            # when moving n squares, or None if that leaves the board
+            ray = [None] * 9
+            path = 0
+            for n in range(1, 8):
+                t_row, t_col = i + d_row * n, j + d_col * n
+                if not (0 <= t_row < 8 and 0 <= t_col < 8):
+                    break
+                ray[n] = (t_row * 8 + t_col, 1 << (t_row * 8 + t_col), path)
+                path |= 1 << (t_row * 8 + t_col)
+            rays.append(ray)
+    return line_masks, square_lines, ray_lines, rays
+
+
+# LINE_MASKS[line]: squares on the line
+# SQUARE_LINES[sq]: (row, col, paradiag, maindiag) lines through sq, the
+#     k-th of them is the line of directions 2k and 2k + 1
+# RAY_LINES[sq * 8 + d]: line walked by direction d from sq
+# RAYS[sq * 8 + d][n]: see _build_tables
+LINE_MASKS, SQUARE_LINES, RAY_LINES, RAYS = _build_tables()
+
+# SQUARES[sq]: (row, col) of sq, shared so that step lists allocate no tuples
+SQUARES = [divmod(sq, 8) for sq in range(64)]
+
+NOT_COL0 = FULL ^ LINE_MASKS[8]
+NOT_COL7 = FULL ^ LINE_MASKS[15]
+
+
+def _build_feature_tables():
+    """
+    The Euler number of 8-connected pieces is (Q1 - Q3 - 2 * QD) / 4, summed
+    over all 2x2 windows (also those hanging over the edge): Q1 / Q3 are
+    windows with one / three pieces, QD those with two diagonal pieces.
+    Placing a piece only changes the four windows around it, so the change
+    depends on its 8-neighbourhood alone.
+    """
+    offsets = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+    def window(cells):
+        a, b, c, d = cells  # top-left, top-right, bottom-left, bottom-right
+        n = a + b + c + d
+        if n == 1:
+            return 1
+        if n == 3:
+            return -1
+        if n == 2 and a == d:
+            return -2
+        return 0
+
+    euler_delta = []
+    for pattern in range(256):
+        near = {offsets[k]: (pattern >> k) & 1 for k in range(8)}
+        delta = 0
+        for top, left in ((-1, -1), (-1, 0), (0, -1), (0, 0)):
+            cells = [near.get((top + di, left + dj), 0) for di in (0, 1) for dj in (0, 1)]
+            centre = -top * 2 - left
+            after = cells[:]
+            cells[centre], after[centre] = 0, 1
+            delta += window(after) - window(cells)
+        euler_delta.append(delta)
+
+    neighbours = []
+    moments = []
+    for sq in range(64):
+        i, j = divmod(sq, 8)
+        neighbours.append(
+            tuple(
+                (1 << k, (i + di) * 8 + j + dj)
+                for k, (di, dj) in enumerate(offsets)
+                if 0 <= i + di < 8 and 0 <= j + dj < 8
+            )
+        )
+        moments.append((i, j, i * i, j * j))
+    return euler_delta, neighbours, moments
+
+
+# EULER_DELTA[pattern]: change of 4 * Euler number when a piece is placed on
+#     a square whose same-colour 8-neighbourhood is pattern
+# NEIGHBOURS[sq]: (pattern bit, square) of the squares around sq
+# SQUARE_MOMENTS[sq]: (row, col, row ** 2, col ** 2)
+EULER_DELTA, NEIGHBOURS, SQUARE_MOMENTS = _build_feature_tables()
+
+# features of one colour start at FEATURE_BASE[color], indexed like bits
+FEATURE_BASE = [None, 0, 5]
+
+
+def grow(bits: int) -> int:
+    """ bits together with their 8-neighbourhood """
+    row = bits | ((bits << 1) & NOT_COL0) | ((bits >> 1) & NOT_COL7)
+    return (row | (row << 8) | (row >> 8)) & FULL
+
+
+def is_group(bits: int) -> bool:
+    """ whether all pieces in bits form one 8-connected group """
+    group = bits & -bits
+    while True:
+        grown = grow(group) & bits
+        if grown == group:
+            return group == bits
+        group = grown
+
+
+def _build_zobrist():
+    # fixed seed: hashes must agree across processes and runs
+    rng = random.Random(20190609)
+    keys = [None, [rng.getrandbits(64) for _ in range(64)], None]
+    keys[W] = [rng.getrandbits(64) for _ in range(64)]
+    return keys, rng.getrandbits(64)
+
+
+# ZOBRIST[color][sq]: key of a piece of color on sq, indexed like bits
+# ZOBRIST_W: key of white to move
+ZOBRIST, ZOBRIST_W = _build_zobrist()
+
+
+def zobrist_hash(black: int, white: int) -> int:
+    """ zobrist key of the pieces, without the side to move """
+    key = 0
+    for bits, keys in ((black, ZOBRIST[B]), (white, ZOBRIST[W])):
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            key ^= keys[low.bit_length() - 1]
+    return key
+
+
+def compute_features(bits: list) -> array:
+    """ Board.features computed from scratch, placing the pieces one by one """
+    features = array("i", [0] * 10)
+    for color in (B, W):
+        base = FEATURE_BASE[color]
+        placed = 0
+        for sq in range(64):
+            if not bits[color] >> sq & 1:
+                continue
+            for k, moment in enumerate(SQUARE_MOMENTS[sq]):
+                features[base + k] += moment
+            pattern = 0
+            for bit, n in NEIGHBOURS[sq]:
+                if placed >> n & 1:
+                    pattern |= bit
+            features[base + 4] += EULER_DELTA[pattern]
+            placed |= 1 << sq
+    return features
+
+
+START_FEATURES = compute_features([0, BLACK_START, WHITE_START])
+
+# checkers count of every line in the initial position
+START_CHECKERS = array(
+    "b", [6, 2, 2, 2, 2, 2, 2, 6] * 2 + [0, 2, 2, 2, 2, 2, 2, 0, 2, 2, 2, 2, 2, 2, 0] * 2
+)
+
+# cells of the initial position, row by row
+START_CELLS = array(
+    "b", [0, 1, 1, 1, 1, 1, 1, 0] + [-1, 0, 0, 0, 0, 0, 0, -1] * 6 + [0, 1, 1, 1, 1, 1, 1, 0]
+)
+
+# pieces[color]: squares of the pieces of color in any order,
+# piece_index[sq]: position of the piece on sq in its list
+START_PIECES = [
+    None,
+    array("b", [sq for sq in range(64) if BLACK_START >> sq & 1]),
+    array("b", [sq for sq in range(64) if WHITE_START >> sq & 1]),
+]
+START_INDEX = array("b", [-1]) * 64
+for _pieces in START_PIECES[1:]:
+    for _k, _sq in enumerate(_pieces):
+        START_INDEX[_sq] = _k
+
 
 class Board:
+    __slots__ = (
+        "bits",
+        "cells",
+        "checkers",
+        "color",
+        "zobrist",
+        "features",
+        "piece_steps",
+        "pieces",
+        "piece_index",
+        "avail_steps",
+        "counts",
+        "is_terminal",
+        "history",
+    )
+
+    # compare the incrementally maintained avail_steps with a full rescan
+    # after every exec, for debugging only
+    check_consistency = False
+
     def __init__(self):
-        self.matrix = [x[:] for x in [[0] * 8] * 8]  # 2d array
-        for i in range(1, 7):
-            self.matrix[0][i] = 1
-            self.matrix[7][i] = 1
-            self.matrix[i][0] = -1
-            self.matrix[i][7] = -1
-
-        self.row_checkers = [6, 2, 2, 2, 2, 2, 2, 6]
-        self.col_checkers = [6, 2, 2, 2, 2, 2, 2, 6]
-        self.maindiag_checkers = [0, 2, 2, 2, 2, 2, 2, 0, 0, 2, 2, 2, 2, 2, 2]
-        self.paradiag_checkers = [0, 2, 2, 2, 2, 2, 2, 0, 0, 2, 2, 2, 2, 2, 2]
+        # bits[B] / bits[W] are the bitboards of black / white pieces,
+        # indexed by color just like `matrix` values
+        self.bits = [0, BLACK_START, WHITE_START]
+        # cells[row * 8 + col]: same numbers as matrix, mirrors bits
+        self.cells = START_CELLS[:]
+
+        # number of pieces on every line, see _build_tables
+        self.checkers = START_CHECKERS[:]
 
         self.color = B
-        self.avail_steps = {B: self.get_avail_steps(B), W: {}}
+        # zobrist key of the pieces, kept up to date by exec
+        self.zobrist = zobrist_hash(BLACK_START, WHITE_START)
+        # see the module docstring, kept up to date by exec
+        self.features = START_FEATURES[:]
+        # piece_steps[sq * 8 + d]: target square of the piece on sq in
+        # direction d, or -1 if it cannot go that way
+        self.piece_steps = array("b", [-1]) * (64 * 8)
+        # piece lists for random_step, see START_PIECES
+        self.pieces = [None, START_PIECES[B][:], START_PIECES[W][:]]
+        self.piece_index = START_INDEX[:]
+        self.avail_steps = {B: {}, W: {}}
+        self.reset_avail_steps()
         self.counts = {B: 12, W: 12}
         self.is_terminal = False
+        # undo records of push, see pop
+        self.history = []
+
+    @property
+    def matrix(self) -> list:
+        """ 2d array built from cells, prefer piece_at in hot loops """
+        cells = self.cells
+        return [cells[i : i + 8].tolist() for i in range(0, 64, 8)]
+
+    def piece_at(self, loc: tuple) -> int:
+        return self.cells[loc[0] * 8 + loc[1]]
+
+    def clone(self) -> "Board":
+        """
+        Copy the board. Only the flat buffers and the two small dicts are
+        copied, step lists are shared since Board never modifies them in place.
+        The history is not copied, the clone cannot pop past its creation.
+        """
+        board = Board.__new__(Board)
+        board.bits = self.bits[:]
+        board.cells = self.cells[:]
+        board.checkers = self.checkers[:]
+        board.color = self.color
+        board.zobrist = self.zobrist
+        board.features = self.features[:]
+        board.piece_steps = self.piece_steps[:]
+        board.pieces = [None, self.pieces[B][:], self.pieces[W][:]]
+        board.piece_index = self.piece_index[:]
+        board.avail_steps = {B: self.avail_steps[B].copy(), W: self.avail_steps[W].copy()}
+        board.counts = self.counts.copy()
+        board.is_terminal = self.is_terminal
+        board.history = []
+        return board
+
+    def __copy__(self) -> "Board":
+        return self.clone()
+
+    def __deepcopy__(self, memo) -> "Board":
+        return self.clone()
 
     def exec(self, source: tuple, target: tuple) -> None:
         if source is None:
             return
-        if self.is_connected():
-            self.is_terminal = True
-            self.color *= -1
-            return
 
         t_row, t_col = target
         s_row, s_col = source
+        s_sq = s_row * 8 + s_col
+        t_sq = t_row * 8 + t_col
+        s_bit = 1 << s_sq
+        t_bit = 1 << t_sq
+        bits = self.bits
 
         # safety checking
-        assert self.matrix[s_row][s_col] == self.color
+        assert bits[self.color] & s_bit
         assert target in self.avail_steps[self.color][source]
 
         # clear source
-        self.matrix[s_row][s_col] = 0
+        bits[self.color] ^= s_bit
+        self.cells[s_sq] = 0
+        self.zobrist ^= ZOBRIST[self.color][s_sq] ^ ZOBRIST[self.color][t_sq]
+        self.update_features(self.color, s_sq, -1)
 
         # may update counts
-        if self.matrix[t_row][t_col] == -self.color:
+        piece_index = self.piece_index
+        captured = bits[-self.color] & t_bit
+        if captured:
+            bits[-self.color] ^= t_bit
             self.counts[-self.color] -= 1
+            self.zobrist ^= ZOBRIST[-self.color][t_sq]
+            self.update_features(-self.color, t_sq, -1)
+            # move the last piece of the list into the captured one's place
+            enemy = self.pieces[-self.color]
+            last = enemy.pop()
+            if last != t_sq:
+                enemy[piece_index[t_sq]] = last
+                piece_index[last] = piece_index[t_sq]
+        k = piece_index[s_sq]
+        self.pieces[self.color][k] = t_sq
+        piece_index[t_sq] = k
 
         # update checkers count
-        self.row_checkers[s_row] -= 1
-        self.col_checkers[s_col] -= 1
-        self.maindiag_checkers[s_col - s_row] -= 1
-        self.paradiag_checkers[7 - s_col - s_row] -= 1
-        if self.matrix[t_row][t_col] == 0:
-            self.row_checkers[t_row] += 1
-            self.col_checkers[t_col] += 1
-            self.maindiag_checkers[t_col - t_row] += 1
-            self.paradiag_checkers[7 - t_col - t_row] += 1
+        checkers = self.checkers
+        for line in SQUARE_LINES[s_sq]:
+            checkers[line] -= 1
+        if not captured:
+            for line in SQUARE_LINES[t_sq]:
+                checkers[line] += 1
 
         # set target
-        self.matrix[t_row][t_col] = self.color
-
-        # update available cache
-        self.avail_steps[-self.color] = self.get_avail_steps(-self.color)
-
-        # test if is terminal
+        bits[self.color] |= t_bit
+        self.cells[t_sq] = self.color
+        self.update_features(self.color, t_sq, 1)
+
+        # update available cache of both colors
+        self.update_avail_steps(source, target)
+        if self.check_consistency:
+            for color in (B, W):
+                assert self.avail_steps[color] == self.get_avail_steps(color)
+            assert self.features == compute_features(bits)
+            for color in (B, W):
+                assert sorted(self.pieces[color]) == [
+                    sq for sq in range(64) if bits[color] >> sq & 1
+                ]
+                for k, sq in enumerate(self.pieces[color]):
+                    assert self.piece_index[sq] == k
+
+        # test if is terminal, -color is always the winner of a terminal board
         if self.counts[-self.color] == 1:
             self.is_terminal = True
-        elif self.is_connected():
+            self.color *= -1
+            return
+        connected = self.get_connected()
+        if connected[self.color]:
+            self.is_terminal = True
+            self.color *= -1
+            return
+        if connected[-self.color]:
+            # a capture may leave the enemy connected
             self.is_terminal = True
+            return
 
-        # if enemy cannot go, also update my available cache, and do not invert color
+        # if enemy cannot go, do not invert color
         if len(self.avail_steps[-self.color]) == 0:
-            self.avail_steps[self.color] = self.get_avail_steps(self.color)
             # if me cannot go either, set current board to is_terminal
             if len(self.avail_steps[self.color]) == 0:
                 self.is_terminal = True
         else:
             self.color *= -1
 
-    def is_connected(self):
-        cur_label = 0
-        labels = [[0 for _ in range(8)] for _ in range(8)]
-        equiv_labels = {}
-
-        def get_label_left(i, j):
-            if j == 0:
-                return 0
-            else:
-                return labels[i][j - 1]
+    def push(self, source: tuple, target: tuple) -> None:
+        """
+        exec a step and remember how to undo it with pop. piece_steps and
+        avail_steps are saved as they are and exec works on copies, so pop
+        puts the saved ones back instead of recomputing the touched lines
+        """
+        # position of the captured piece in its list, -1 if none
+        captured = -1
+        if source is not None and self.piece_at(target) != 0:
+            captured = self.piece_index[target[0] * 8 + target[1]]
+        avail_steps = self.avail_steps
+        self.history.append(
+            (
+                source,
+                target,
+                captured,
+                self.color,
+                self.is_terminal,
+                self.zobrist,
+                self.features[:],
+                self.piece_steps,
+                avail_steps,
+            )
+        )
+        self.piece_steps = self.piece_steps[:]
+        self.avail_steps = {B: avail_steps[B].copy(), W: avail_steps[W].copy()}
+        self.exec(source, target)
+
+    def pop(self) -> None:
+        """ undo the last push, restoring the board exactly """
+        (
+            source,
+            target,
+            captured,
+            color,
+            is_terminal,
+            zobrist,
+            features,
+            piece_steps,
+            avail_steps,
+        ) = self.history.pop()
+        self.color = color
+        self.is_terminal = is_terminal
+        self.zobrist = zobrist
+        self.features = features
+        self.piece_steps = piece_steps
+        self.avail_steps = avail_steps
+        if source is None:
+            return
 
-        def get_label_lefttop(i, j):
-            if j == 0 or i == 0:
-                return 0
+        s_row, s_col = source
+        t_row, t_col = target
+        s_sq = s_row * 8 + s_col
+        t_sq = t_row * 8 + t_col
+        bits = self.bits
+
+        # move the piece back
+        bits[color] ^= (1 << s_sq) | (1 << t_sq)
+        self.cells[s_sq] = color
+        self.cells[t_sq] = 0
+        piece_index = self.piece_index
+        k = piece_index[t_sq]
+        self.pieces[color][k] = s_sq
+        piece_index[s_sq] = k
+
+        # restore checkers count and the captured piece
+        checkers = self.checkers
+        for line in SQUARE_LINES[s_sq]:
+            checkers[line] += 1
+        if captured >= 0:
+            bits[-color] |= 1 << t_sq
+            self.cells[t_sq] = -color
+            self.counts[-color] += 1
+            # undo the swap in exec, so the list order is restored too
+            enemy = self.pieces[-color]
+            if captured < len(enemy):
+                last = enemy[captured]
+                piece_index[last] = len(enemy)
+                enemy.append(last)
+                enemy[captured] = t_sq
             else:
-                return labels[i - 1][j - 1]
-
-        def get_label_top(i, j):
-            if i == 0:
-                return 0
+                enemy.append(t_sq)
+            piece_index[t_sq] = captured
+        else:
+            for line in SQUARE_LINES[t_sq]:
+                checkers[line] -= 1
+
+        if self.check_consistency:
+            for c in (B, W):
+                assert self.avail_steps[c] == self.get_avail_steps(c)
+
+    def update_features(self, color: int, sq: int, sign: int) -> None:
+        """
+        A piece of color is placed on (sign = 1) or removed from (sign = -1)
+        sq, with the cells around sq already as they are after the change
+        """
+        features = self.features
+        base = FEATURE_BASE[color]
+        row, col, row2, col2 = SQUARE_MOMENTS[sq]
+        features[base] += sign * row
+        features[base + 1] += sign * col
+        features[base + 2] += sign * row2
+        features[base + 3] += sign * col2
+        cells = self.cells
+        pattern = 0
+        for bit, n in NEIGHBOURS[sq]:
+            if cells[n] == color:
+                pattern |= bit
+        features[base + 4] += sign * EULER_DELTA[pattern]
+
+    def is_connected(self, color: int = None) -> bool:
+        """ whether all pieces of color (default: current color) are connected """
+        if color is None:
+            color = self.color
+        return is_group(self.bits[color])
+
+    def get_connected(self) -> dict:
+        """
+        Check both colors at once: {B: bool, W: bool}. The two flood fills
+        grow side by side until both stop changing.
+        """
+        black, white = self.bits[B], self.bits[W]
+        black_group = black & -black
+        white_group = white & -white
+        while True:
+            black_grown = grow(black_group) & black
+            white_grown = grow(white_group) & white
+            if black_grown == black_group and white_grown == white_group:
+                return {B: black_group == black, W: white_group == white}
+            black_group, white_group = black_grown, white_grown
+
+    def reset_avail_steps(self) -> None:
+        """ recompute piece_steps and avail_steps from scratch """
+        for color in (B, W):
+            own = self.bits[color]
+            enemy = self.bits[-color]
+            steps = {}
+            pieces = own
+            while pieces:
+                low = pieces & -pieces
+                pieces ^= low
+                sq = low.bit_length() - 1
+                for d in range(8):
+                    self.piece_steps[sq * 8 + d] = self.get_ray_step(sq, d, own, enemy)
+                targets = [
+                    SQUARES[x] for x in self.piece_steps[sq * 8 : sq * 8 + 8] if x >= 0
+                ]
+                if targets:
+                    steps[SQUARES[sq]] = targets
+            self.avail_steps[color] = steps
+
+    def update_avail_steps(self, source: tuple, target: tuple) -> None:
+        """
+        Incrementally update avail_steps after moving from source to target.
+
+        Only the lines through source or target change their checkers count or
+        occupancy, so only the steps of pieces on those lines, along those
+        lines, need to be recomputed.
+        """
+        s_lines = SQUARE_LINES[source[0] * 8 + source[1]]
+        t_lines = SQUARE_LINES[target[0] * 8 + target[1]]
+        # (line mask, first of the two directions along it)
+        lines = [(LINE_MASKS[line], 2 * k) for k, line in enumerate(s_lines)]
+        for k, line in enumerate(t_lines):
+            # source and target share exactly one line: the one moved along
+            if line not in s_lines:
+                lines.append((LINE_MASKS[line], 2 * k))
+
+        black = self.bits[B]
+        white = self.bits[W]
+        piece_steps = self.piece_steps
+        dirty = 0
+        for mask, d in lines:
+            pieces = mask & (black | white)
+            dirty |= pieces
+            while pieces:
+                low = pieces & -pieces
+                pieces ^= low
+                sq = low.bit_length() - 1
+                if black & low:
+                    own, enemy = black, white
+                else:
+                    own, enemy = white, black
+                piece_steps[sq * 8 + d] = self.get_ray_step(sq, d, own, enemy)
+                piece_steps[sq * 8 + d + 1] = self.get_ray_step(sq, d + 1, own, enemy)
+
+        for steps in self.avail_steps.values():
+            steps.pop(source, None)
+            steps.pop(target, None)
+        while dirty:
+            low = dirty & -dirty
+            dirty ^= low
+            sq = low.bit_length() - 1
+            steps = self.avail_steps[B if black & low else W]
+            targets = [SQUARES[x] for x in piece_steps[sq * 8 : sq * 8 + 8] if x >= 0]
+            if targets:
+                steps[SQUARES[sq]] = targets
             else:
-                return labels[i - 1][j]
+                steps.pop(SQUARES[sq], None)
 
-        def get_label_righttop(i, j):
-            if i == 0 or j == 7:
-                return 0
-            else:
-                return labels[i - 1][j + 1]
-
-        # first pass
-        for i in range(8):
-            for j in range(8):
-                if self.matrix[i][j] == self.color:
-                    four_labels = [get_label_left(i, j),get_label_lefttop(i, j),get_label_righttop(i, j),get_label_top(i, j) ]
-                    zeros = []
-                    non_zeros = []
-                    for k in range(4):
-                        if four_labels[k] == 0:
-                            zeros.append(four_labels[k])
-                        elif four_labels[k] not in non_zeros:
-                            non_zeros.append(four_labels[k])
-                    if len(zeros) == 4:
-                        labels[i][j] = cur_label + 1
-                        cur_label += 1
-                    elif len(non_zeros) == 1:
-                        labels[i][j] = non_zeros[0]
-                    else:
-                        labels[i][j] = non_zeros[0]
-                        if four_labels[0] in equiv_labels:
-                            equiv_labels[four_labels[0]].append(four_labels[1])
-                        else:
-                            equiv_labels[four_labels[0]] = [four_labels[1]]
-        # second pass
-        max_label = 0
-        for i in range(8):
-            for j in range(8):
-                if self.matrix[i][j] == self.color:
-                    if labels[i][j] in equiv_labels:
-                        labels[i][j] = min(labels[i][j], *equiv_labels[labels[i][j]])
-                    max_label = max(max_label, labels[i][j])
-        # from pprint import pprint
-        # pprint(labels)
-        # print(max_label)
-        return max_label == 1
-        
     def get_avail_steps(self, color: int) -> dict:
         steps = {}
-        for i in range(8):
-            for j in range(8):
-                if self.matrix[i][j] == color:
-                    n_row = self.row_checkers[i]
-                    n_col = self.col_checkers[j]
-                    n_md = self.maindiag_checkers[j - i]
-                    n_pd = self.paradiag_checkers[7 - j - i]
-
-                    # 向右走
-                    if j + n_row < 8 and self.matrix[i][j + n_row] != color:
-                        no_enemy = True
-                        for col in range(j + 1, j + n_row):
-                            if self.matrix[i][col] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i, j + n_row))
-                            else:
-                                steps[(i, j)] = [(i, j + n_row)]
-
-                    # 向左走
-                    if j - n_row >= 0 and self.matrix[i][j - n_row] != color:
-                        no_enemy = True
-                        for col in range(j - 1, j - n_row, -1):
-                            if self.matrix[i][col] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i, j - n_row))
-                            else:
-                                steps[(i, j)] = [(i, j - n_row)]
-
-                    # 向下走
-                    if i + n_col < 8 and self.matrix[i + n_col][j] != color:
-                        no_enemy = True
-                        for row in range(i + 1, i + n_col):
-                            if self.matrix[row][j] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i + n_col, j))
-                            else:
-                                steps[(i, j)] = [(i + n_col, j)]
-
-                    # 向上走
-                    if i - n_col >= 0 and self.matrix[i - n_col][j] != color:
-                        no_enemy = True
-                        for row in range(i - 1, i - n_col, -1):
-                            if self.matrix[row][j] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i - n_col, j))
-                            else:
-                                steps[(i, j)] = [(i - n_col, j)]
-
-                    # 向右上走
-                    if (
-                        i - n_pd >= 0
-                        and j + n_pd < 8
-                        and self.matrix[i - n_pd][j + n_pd] != color
-                    ):
-                        no_enemy = True
-                        for d in range(1, n_pd):
-                            if self.matrix[i - d][j + d] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i - n_pd, j + n_pd))
-                            else:
-                                steps[(i, j)] = [(i - n_pd, j + n_pd)]
-
-                    # 向左下走
-                    if (
-                        i + n_pd < 8
-                        and j - n_pd >= 0
-                        and self.matrix[i + n_pd][j - n_pd] != color
-                    ):
-                        no_enemy = True
-                        for d in range(1, n_pd):
-                            if self.matrix[i + d][j - d] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i + n_pd, j - n_pd))
-                            else:
-                                steps[(i, j)] = [(i + n_pd, j - n_pd)]
-
-                    # 向左上走
-                    if (
-                        i - n_md >= 0
-                        and j - n_md >= 0
-                        and self.matrix[i - n_md][j - n_md] != color
-                    ):
-                        no_enemy = True
-                        for d in range(1, n_md):
-                            if self.matrix[i - d][j - d] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i - n_md, j - n_md))
-                            else:
-                                steps[(i, j)] = [(i - n_md, j - n_md)]
-
-                    # 向右下走
-                    if (
-                        i + n_md < 8
-                        and j + n_md < 8
-                        and self.matrix[i + n_md][j + n_md] != color
-                    ):
-                        no_enemy = True
-                        for d in range(1, n_md):
-                            if self.matrix[i + d][j + d] == -color:
-                                no_enemy = False
-                                break
-                        if no_enemy:
-                            if (i, j) in steps:
-                                steps[(i, j)].append((i + n_md, j + n_md))
-                            else:
-                                steps[(i, j)] = [(i + n_md, j + n_md)]
+        own = self.bits[color]
+        enemy = self.bits[-color]
+        pieces = own
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            i, j = SQUARES[low.bit_length() - 1]
+            targets = self.get_piece_steps(i, j, own, enemy)
+            if targets:
+                steps[(i, j)] = targets
         return steps
 
+    def get_piece_steps(self, i: int, j: int, own: int, enemy: int) -> list:
+        targets = []
+        for d in range(8):
+            target = self.get_ray_step(i * 8 + j, d, own, enemy)
+            if target >= 0:
+                targets.append(SQUARES[target])
+        return targets
+
+    def get_ray_step(self, sq: int, d: int, own: int, enemy: int) -> int:
+        """ target square of the piece on sq moving in direction d, -1 if illegal """
+        ray = RAYS[sq * 8 + d][self.checkers[RAY_LINES[sq * 8 + d]]]
+        if ray is None:
+            return -1
+        target, target_bit, path = ray
+        # cannot land on own piece, cannot jump over an enemy piece
+        if own & target_bit or enemy & path:
+            return -1
+        return target
+
+    def random_step(self, rand=random.random):
+        """
+        A uniformly random legal step (source, target) of the side to move,
+        None if it cannot go. Draws (piece, direction) pairs until the piece
+        can go that way; every legal step is exactly one such pair, so all of
+        them are equally likely. Nothing is allocated but the returned tuple.
+        """
+        if not self.avail_steps[self.color]:
+            return None
+        pieces = self.pieces[self.color]
+        piece_steps = self.piece_steps
+        n = len(pieces) * 8
+        while True:
+            k = int(rand() * n)
+            sq = pieces[k >> 3]
+            target = piece_steps[sq * 8 + (k & 7)]
+            if target >= 0:
+                return SQUARES[sq], SQUARES[target]
+
     def get_avail_steps_in(self, loc: tuple, color) -> list:
         if loc in self.avail_steps[color]:
             return self.avail_steps[color][loc]
@@ -319,12 +701,25 @@ class Board:
 
         pprint(self.matrix)
 
+    def hash_after(self, source: tuple, target: tuple) -> int:
+        """ zobrist key of the pieces after the step, without exec """
+        s_sq = source[0] * 8 + source[1]
+        t_sq = target[0] * 8 + target[1]
+        key = self.zobrist ^ ZOBRIST[self.color][s_sq] ^ ZOBRIST[self.color][t_sq]
+        if self.cells[t_sq] == -self.color:
+            key ^= ZOBRIST[-self.color][t_sq]
+        return key
+
+    @property
+    def key(self) -> int:
+        """ 64-bit zobrist key of the position, including the side to move """
+        if self.color == W:
+            return self.zobrist ^ ZOBRIST_W
+        return self.zobrist
+
     def hash_state(self) -> str:
-        ret = ""
-        for row in range(8):
-            for col in range(8):
-                ret += str(self.matrix[row][col])
-        return ret
+        """ the pieces as a string of matrix values, kept for compatibility; use key """
+        return "".join(map(str, self.cells))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+"""
+离线工具，在 src 目录下运行，例如：
+
+    python -m tools.build_book -h
+"""
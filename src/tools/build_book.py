@@ -0,0 +1,80 @@
+"""
+离线生成开局库：从初始局面开始逐层展开，每个局面用 alphabeta 引擎搜索
+--time 秒，记录最佳走法（权重为完成的搜索深度）；再展开最佳走法以及静态估值
+最好的另外 --width - 1 个走法，直到 --plies 步为止。
+"""
+import argparse
+
+from engines.alphabeta import AlphaBeta
+from engines.book import DEFAULT_PATH, OpeningBook, write_book
+from engines.evaluation import advantage
+from engines.mcts import legal_moves, unpack_move
+from env.board import B, Board
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("-o", "--output", default=DEFAULT_PATH, help="Book file to write.")
+parser.add_argument("-p", "--plies", type=int, default=4, help="Plies covered by the book.")
+parser.add_argument("-w", "--width", type=int, default=3, help="Moves expanded per position.")
+parser.add_argument("-t", "--time", type=float, default=2, help="Seconds per position.")
+parser.add_argument(
+    "--merge", action="store_true", help="Keep the records already in --output."
+)
+
+
+def candidates(board: Board, best: int, width: int) -> list:
+    """ best 加上静态估值最好的另外 width - 1 个走法 """
+    color = board.color
+    scores = {}
+    for move in legal_moves(board):
+        if move == best:
+            continue
+        board.push(*unpack_move(move))
+        if board.is_terminal:
+            score = float("inf") if board.color != color else float("-inf")
+        else:
+            score = advantage(board) if color == B else -advantage(board)
+        board.pop()
+        scores[move] = score
+    others = sorted(scores, key=scores.__getitem__, reverse=True)
+    return [best] + others[: width - 1]
+
+
+def build(plies: int, width: int, seconds: float) -> list:
+    engine = AlphaBeta(time=seconds, book="", telemetry="")
+    records = []
+    seen = set()
+    frontier = [Board()]
+    for ply in range(plies):
+        children = []
+        for board in frontier:
+            key = board.key
+            if board.is_terminal or key in seen:
+                continue
+            seen.add(key)
+            move = engine.get_play(board)
+            records.append((key, move, max(engine.depth, 1)))
+            print(
+                "ply %d, %d positions: %s -> %s (depth %d)"
+                % ((ply, len(records)) + unpack_move(move) + (engine.depth,))
+            )
+            for m in candidates(board, move, width):
+                child = board.clone()
+                child.exec(*unpack_move(m))
+                children.append(child)
+        frontier = children
+    return records
+
+
+def main():
+    args = parser.parse_args()
+    records = build(args.plies, args.width, args.time)
+    if args.merge:
+        book = OpeningBook(args.output)
+        records.extend(book.records())
+        book.close()
+    n = write_book(args.output, records)
+    print("%d records written to %s" % (n, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+无界面的引擎对战：按名字从 engines 包加载引擎，每对引擎下 --games 局，
+双方轮流执黑，用进程池同时下多局。每局结束后向 --output 追加一行 JSON，
+全部结束后打印胜率、Elo 差（95% 置信区间）与平均每步用时。
+
+引擎写成 name 或 name:key=value,...，例如 mcts:time=1,rollout_depth=10；
+冒号后的选项只给这个引擎，-t、--nodes 等选项给所有引擎。
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import time
+
+from engines import load_engine
+from env.board import B, Board, W
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("engines", nargs="+", help="Engines to play, at least two.")
+parser.add_argument("-g", "--games", type=int, default=10, help="Games per pair of engines.")
+parser.add_argument(
+    "-j", "--jobs", type=int, default=multiprocessing.cpu_count(), help="Games played at once."
+)
+parser.add_argument("-o", "--output", default="tournament.jsonl", help="JSON lines results.")
+parser.add_argument("--max-plies", type=int, default=300, help="Plies before a draw.")
+parser.add_argument("-t", "--time", type=float, help="Seconds per move.")
+parser.add_argument("--game-time", type=float, help="Total seconds per game.")
+parser.add_argument("--increment", type=float, help="Seconds added after each move.")
+parser.add_argument("--nodes", type=int, help="Playouts (nodes) per move.")
+parser.add_argument("--rollout-depth", type=int, help="Random plies before scoring a playout.")
+parser.add_argument("--book", help="Opening book, empty to disable.")
+parser.add_argument("--seed", type=int, default=0)
+
+# 95% 置信区间
+Z = 1.96
+# 引擎选项中的布尔值
+BOOLEANS = {"true": True, "false": False}
+
+
+def parse_value(text: str):
+    """ true / false（不分大小写）、整数、小数，其余原样作为字符串 """
+    if text.lower() in BOOLEANS:
+        return BOOLEANS[text.lower()]
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_engine(spec: str) -> tuple:
+    """ "name:key=value,..." -> (name, {key: value}) """
+    name, _, rest = spec.partition(":")
+    options = {}
+    for item in filter(None, rest.split(",")):
+        key, _, value = item.partition("=")
+        options[key.replace("-", "_")] = parse_value(value)
+    return name, options
+
+
+def play_game(job: dict) -> dict:
+    """ 在子进程中下一局，返回这一局的记录 """
+    random.seed(job["seed"])
+    players = {
+        B: load_engine(job["black"], **job["black_options"]),
+        W: load_engine(job["white"], **job["white_options"]),
+    }
+    board = Board()
+    seconds = {B: 0.0, W: 0.0}
+    moves = {B: 0, W: 0}
+    start = time.monotonic()
+    for _ in range(job["max_plies"]):
+        if board.is_terminal:
+            break
+        color = board.color
+        t = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):
+            source, target = players[color].exec(board.clone())
+        seconds[color] += time.monotonic() - t
+        moves[color] += 1
+        board.exec(source, target)
+    for engine in players.values():
+        if hasattr(engine, "end_game"):
+            engine.end_game()
+        if hasattr(engine, "close"):
+            engine.close()
+
+    winner = None
+    if board.is_terminal:
+        winner = "black" if board.color == W else "white"
+    return {
+        "game": job["game"],
+        "black": job["black_spec"],
+        "white": job["white_spec"],
+        "winner": winner,
+        "plies": moves[B] + moves[W],
+        "black_time": seconds[B],
+        "white_time": seconds[W],
+        "black_moves": moves[B],
+        "white_moves": moves[W],
+        "seconds": time.monotonic() - start,
+        "seed": job["seed"],
+    }
+
+
+def schedule(specs: list, games: int, max_plies: int, options: dict, seed: int) -> list:
+    """ 每对引擎 games 局，双方轮流执黑 """
+    parsed = {}
+    for spec in specs:
+        name, own = parse_engine(spec)
+        parsed[spec] = (name, dict(options, **own))
+    jobs = []
+    for a, b in itertools.combinations(specs, 2):
+        for g in range(games):
+            black, white = (a, b) if g % 2 == 0 else (b, a)
+            jobs.append(
+                {
+                    "game": len(jobs),
+                    "black": parsed[black][0],
+                    "black_options": parsed[black][1],
+                    "black_spec": black,
+                    "white": parsed[white][0],
+                    "white_options": parsed[white][1],
+                    "white_spec": white,
+                    "max_plies": max_plies,
+                    "seed": seed + len(jobs),
+                }
+            )
+    return jobs
+
+
+def elo(score: float) -> float:
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def elo_interval(wins: int, losses: int, draws: int) -> tuple:
+    """ (Elo 差, 下界, 上界)，用得分的正态近似 """
+    n = wins + losses + draws
+    score = (wins + 0.5 * draws) / n
+    variance = (
+        wins * (1.0 - score) ** 2 + losses * score ** 2 + draws * (0.5 - score) ** 2
+    ) / n
+    margin = Z * math.sqrt(variance / n)
+    return elo(score), elo(score - margin), elo(score + margin)
+
+
+def summarize(specs: list, results: list) -> None:
+    print()
+    for a, b in itertools.combinations(specs, 2):
+        wins = losses = draws = 0
+        for r in results:
+            if {r["black"], r["white"]} != {a, b}:
+                continue
+            if r["winner"] is None:
+                draws += 1
+            elif r[r["winner"]] == a:
+                wins += 1
+            else:
+                losses += 1
+        n = wins + losses + draws
+        if n == 0:
+            continue
+        diff, low, high = elo_interval(wins, losses, draws)
+        print(
+            "%s vs %s: +%d -%d =%d, score %.1f %%, Elo %+.0f [%+.0f, %+.0f]"
+            % (a, b, wins, losses, draws, 100.0 * (wins + 0.5 * draws) / n, diff, low, high)
+        )
+
+    print()
+    for spec in specs:
+        seconds = moves = 0
+        for r in results:
+            for side in ("black", "white"):
+                if r[side] == spec:
+                    seconds += r[side + "_time"]
+                    moves += r[side + "_moves"]
+        if moves:
+            print("%s: %.3f s per move over %d moves" % (spec, seconds / moves, moves))
+
+
+def main():
+    args = parser.parse_args()
+    if len(args.engines) < 2:
+        parser.error("at least two engines are needed")
+    options = {
+        key: value
+        for key, value in (
+            ("time", args.time),
+            ("game_time", args.game_time),
+            ("increment", args.increment),
+            ("nodes", args.nodes),
+            ("rollout_depth", args.rollout_depth),
+            ("book", args.book),
+        )
+        if value is not None
+    }
+    for spec in args.engines:
+        # 每局在进程池的 daemon 进程中下，不能再创建子进程
+        if parse_engine(spec)[1].get("workers", 1) > 1:
+            parser.error(
+                "%s: workers must be 1, each game already runs in its own process" % spec
+            )
+    jobs = schedule(args.engines, args.games, args.max_plies, options, args.seed)
+
+    results = []
+    with open(args.output, "a") as output, multiprocessing.Pool(args.jobs) as pool:
+        # 每局结束就写入，中途停止时已下完的局仍然保留
+        for result in pool.imap_unordered(play_game, jobs):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            results.append(result)
+            print(
+                "game %d/%d: %s (B) vs %s (W), %s, %d plies"
+                % (
+                    len(results),
+                    len(jobs),
+                    result["black"],
+                    result["white"],
+                    result["winner"] or "draw",
+                    result["plies"],
+                )
+            )
+    summarize(args.engines, results)
+
+
+if __name__ == "__main__":
+    main()